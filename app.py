@@ -6,7 +6,24 @@ from openchallenges.ecs_stack import EcsStack
 from openchallenges.service_stack import ServiceStack
 from openchallenges.service_stack import LoadBalancedServiceStack
 from openchallenges.load_balancer_stack import LoadBalancerStack
-from openchallenges.service_props import ServiceProps
+from openchallenges.cdn_stack import CdnStack
+from openchallenges.cache_stack import CacheStack
+from openchallenges.database_stack import DatabaseStack
+from openchallenges.search_stack import SearchStack
+from openchallenges.image_prewarm_stack import ImagePrewarmStack
+from openchallenges.observability_stack import ObservabilityStack
+from openchallenges.registry_cache_stack import RegistryCacheStack
+from openchallenges.service_props import (
+    ServiceProps,
+    AutoScalingProps,
+    VolumeProps,
+    CapacityProps,
+    JvmProps,
+    LoadBalancingProps,
+    AlarmProps,
+    DeploymentProps,
+)
+from openchallenges.stack_registry import StackRegistry
 import openchallenges.utils as utils
 
 app = cdk.App()
@@ -22,353 +39,724 @@ fully_qualified_domain_name = env_vars["FQDN"]
 subdomain, domain = fully_qualified_domain_name.split(".", 1)
 vpc_cidr = env_vars["VPC_CIDR"]
 certificate_arn = env_vars["CERTIFICATE_ARN"]
+# optional, pull the ghcr.io images through an ECR pull through cache
+registry_cache_credential_arn = env_vars.get("REGISTRY_CACHE_CREDENTIAL_ARN")
+# optional, run the database on Aurora MySQL instead of the mariadb container
+database_config = env_vars.get("DATABASE")
+database_stack_name = "database" if database_config else "mariadb"
+# optional, run the search engine on Amazon OpenSearch Service instead of the elasticsearch container
+search_config = env_vars.get("SEARCH")
+search_stack_name = "search" if search_config else "elasticsearch"
+
+thumbor_max_age = 86400
+
+# JVM settings of the Spring services, their containers get the task memory minus 256 MiB
+# left to the Service Connect proxy
+spring_jvm = JvmProps(heap_percentage=70, max_metaspace_size=256)
+
+# endpoints the services wait for before starting, the managed database and search
+# endpoints are available before the services are deployed
+config_server_endpoint = "http://openchallenges-config-server:8090/actuator/health"
+service_registry_endpoint = (
+    "http://openchallenges-service-registry:8081/actuator/health"
+)
+storage_endpoints = []
+if not database_config:
+    storage_endpoints.append("tcp://openchallenges-mariadb:3306")
+if not search_config:
+    storage_endpoints.append(
+        "http://openchallenges-elasticsearch:9200/_cluster/health?wait_for_status=yellow&timeout=1s"
+    )
 
-# get secrets from cdk.json or aws parameter store
-secrets = utils.get_secrets(app)
+# stateless services keep one task on on-demand Fargate and run 3 out of 4 extra tasks on Spot
+stateless_capacity = CapacityProps(on_demand_base=1, on_demand_weight=1, spot_weight=3)
 
-bucket_stack = BucketStack(app, f"{stack_name_prefix}-buckets")
+# Stacks are registered with their dependencies and the secrets they use, only the
+# selected stacks (see utils.get_selected_stacks) and their dependencies are constructed.
+registry = StackRegistry()
 
-network_stack = NetworkStack(app, f"{stack_name_prefix}-network", vpc_cidr)
 
-ecs_stack = EcsStack(
-    app, f"{stack_name_prefix}-ecs", network_stack.vpc, fully_qualified_domain_name
-)
-ecs_stack.add_dependency(network_stack)
-
-mariadb_props = ServiceProps(
-    "openchallenges-mariadb",
-    3306,
-    512,
-    f"ghcr.io/sage-bionetworks/openchallenges-mariadb:{image_version}",
-    {
-        "MARIADB_USER": "maria",
-        "MARIADB_PASSWORD": secrets["MARIADB_PASSWORD"],
-        "MARIADB_ROOT_PASSWORD": secrets["MARIADB_ROOT_PASSWORD"],
-    },
-)
+def service_stack(
+    stacks: StackRegistry, name: str, props: ServiceProps
+) -> ServiceStack:
+    return ServiceStack(
+        app,
+        f"{stack_name_prefix}-{name}",
+        stacks["network"].vpc,
+        stacks["ecs"].cluster,
+        props,
+        registry_cache=registry_cache(stacks),
+    )
 
-mariadb_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-mariadb",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    mariadb_props,
-)
 
-elasticsearch_props = ServiceProps(
-    "openchallenges-elasticsearch",
-    9200,
-    2048,
-    f"ghcr.io/sage-bionetworks/openchallenges-elasticsearch:{image_version}",
-    {
-        "bootstrap.memory_lock": "true",
-        "discovery.type": "single-node",  # https://stackoverflow.com/a/68253868
-        "JAVA_TOOL_OPTIONS": "-XX:InitialHeapSize=1g -XX:MaxHeapSize=1g",
-    },
-)
+def registry_cache(stacks: StackRegistry) -> RegistryCacheStack:
+    return stacks["registry-cache"] if registry_cache_credential_arn else None
 
-elasticsearch_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-elasticsearch",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    elasticsearch_props,
-)
 
-thumbor_props = ServiceProps(
-    "openchallenges-thumbor",
-    8889,
-    512,
-    f"ghcr.io/sage-bionetworks/openchallenges-thumbor:{image_version}",
-    {
-        "LOG_LEVEL": "info",
-        "PORT": "8889",
-        "LOADER": "thumbor_aws.loader",
-        "AWS_LOADER_REGION_NAME": "us-east-1",
-        "AWS_LOADER_BUCKET_NAME": bucket_stack.openchallenges_img_bucket.bucket_name,
-        "AWS_LOADER_S3_ENDPOINT_URL": "http://s3.us-east-1.amazonaws.com",
-        "AWS_LOADER_ROOT_PATH": "img",
-        "STORAGE": "thumbor.storages.file_storage",
-        "FILE_STORAGE_ROOT_PATH": "/data/storage",
-        "RESULT_STORAGE": "thumbor.result_storages.file_storage",
-        "RESULT_STORAGE_FILE_STORAGE_ROOT_PATH": "/data/result_storage",
-        "RESULT_STORAGE_STORES_UNSAFE": "True",
-        "RESULT_STORAGE_EXPIRATION_SECONDS": "2629746",
-        "SECURITY_KEY": secrets["SECURITY_KEY"],
-        "ALLOW_UNSAFE_URL": "True",
-        "QUALITY": "100",
-        "MAX_AGE": "86400",
-        "AUTO_PNG_TO_JPG": "True",
-        "HTTP_LOADER_VALIDATE_CERTS": "False",
-    },
-)
+# the service stacks pull their images through the registry cache when it is enabled
+def service_dependencies(depends_on: list) -> list:
+    return depends_on + (["registry-cache"] if registry_cache_credential_arn else [])
 
-thumbor_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-thumbor",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    thumbor_props,
-)
-thumbor_stack.add_dependency(bucket_stack)
-
-config_server_props = ServiceProps(
-    "openchallenges-config-server",
-    8090,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-config-server:{image_version}",
-    {
-        "GIT_DEFAULT_LABEL": "test-2",
-        "GIT_HOST_KEY_ALGORITHM": "ssh-ed25519",
-        "GIT_HOST_KEY": secrets["GIT_HOST_KEY"],
-        "GIT_PRIVATE_KEY": secrets["GIT_PRIVATE_KEY"],
-        "GIT_URI": "git@github.com:Sage-Bionetworks/openchallenges-config-server-repository.git",
-        "SERVER_PORT": "8090",
-    },
-)
 
-config_server_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-config-server",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    config_server_props,
-)
+def bucket_stack(stacks: StackRegistry) -> BucketStack:
+    return BucketStack(app, f"{stack_name_prefix}-buckets")
 
-service_registry_props = ServiceProps(
-    "openchallenges-service-registry",
-    8081,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-service-registry:{image_version}",
-    {
-        "SERVER_PORT": "8081",
-        "DEFAULT_ZONE": "http://localhost:8081/eureka",
-        "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
-    },
-)
 
-service_registry_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-service-registry",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    service_registry_props,
-)
-service_registry_stack.add_dependency(config_server_stack)
-
-zipkin_props = ServiceProps(
-    "openchallenges-zipkin",
-    9411,
-    512,
-    f"ghcr.io/sage-bionetworks/openchallenges-zipkin:{image_version}",
-    {},
-)
+registry.add("buckets", bucket_stack)
 
-zipkin_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-zipkin",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    zipkin_props,
-)
 
-image_service_props = ServiceProps(
-    "openchallenges-image-service",
-    8086,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-image-service:{image_version}",
-    {
-        "SERVER_PORT": "8086",
-        "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
-        "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
-        "OPENCHALLENGES_IMAGE_SERVICE_THUMBOR_HOST": f"https://{fully_qualified_domain_name}/img/",
-        "OPENCHALLENGES_IMAGE_SERVICE_THUMBOR_SECURITY_KEY": secrets["SECURITY_KEY"],
-        "OPENCHALLENGES_IMAGE_SERVICE_IS_DEPLOYED_ON_AWS": "true",
-    },
-)
+def network_stack(stacks: StackRegistry) -> NetworkStack:
+    return NetworkStack(app, f"{stack_name_prefix}-network", vpc_cidr)
+
+
+registry.add("network", network_stack)
 
-image_service_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-image-service",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    image_service_props,
+
+def ecs_stack(stacks: StackRegistry) -> EcsStack:
+    return EcsStack(
+        app,
+        f"{stack_name_prefix}-ecs",
+        stacks["network"].vpc,
+        fully_qualified_domain_name,
+    )
+
+
+def registry_cache_stack(stacks: StackRegistry) -> RegistryCacheStack:
+    return RegistryCacheStack(
+        app, f"{stack_name_prefix}-registry-cache", registry_cache_credential_arn
+    )
+
+
+if registry_cache_credential_arn:
+    registry.add("registry-cache", registry_cache_stack)
+
+registry.add("ecs", ecs_stack, depends_on=["network"])
+
+
+# cache shared by the challenge, organization and image services
+def cache_stack(stacks: StackRegistry) -> CacheStack:
+    return CacheStack(app, f"{stack_name_prefix}-cache", stacks["network"].vpc)
+
+
+registry.add("cache", cache_stack, depends_on=["network"])
+
+
+def mariadb_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-mariadb",
+        3306,
+        512,
+        f"ghcr.io/sage-bionetworks/openchallenges-mariadb:{image_version}",
+        {
+            "MARIADB_USER": "maria",
+            "MARIADB_PASSWORD": stacks.secrets["MARIADB_PASSWORD"],
+            "MARIADB_ROOT_PASSWORD": stacks.secrets["MARIADB_ROOT_PASSWORD"],
+        },
+        task_cpu=512,
+        task_memory=1024,
+        volume=VolumeProps("/data/db", size=30, iops=6000, throughput=250),
+    )
+    return service_stack(stacks, "mariadb", props)
+
+
+def database_stack(stacks: StackRegistry) -> DatabaseStack:
+    return DatabaseStack(
+        app,
+        f"{stack_name_prefix}-database",
+        stacks["network"].vpc,
+        "maria",
+        stacks.secrets["MARIADB_PASSWORD"],
+        instance_type=database_config.get("INSTANCE_TYPE", "t4g.medium"),
+        readers=database_config.get("READERS", 1),
+    )
+
+
+if database_config:
+    registry.add(
+        "database",
+        database_stack,
+        depends_on=["network"],
+        secrets=["MARIADB_PASSWORD"],
+    )
+else:
+    registry.add(
+        "mariadb",
+        mariadb_stack,
+        depends_on=service_dependencies(["network", "ecs"]),
+        secrets=["MARIADB_PASSWORD", "MARIADB_ROOT_PASSWORD"],
+    )
+
+
+def database_url(stacks: StackRegistry, database: str) -> str:
+    if database_config:
+        # the mariadb container creates the service databases, Aurora does not
+        return stacks["database"].jdbc_url(
+            database, "allowLoadLocalInfile=true&createDatabaseIfNotExist=true"
+        )
+    return (
+        f"jdbc:mysql://openchallenges-mariadb:3306/{database}?allowLoadLocalInfile=true"
+    )
+
+
+def elasticsearch_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-elasticsearch",
+        9200,
+        3840,
+        f"ghcr.io/sage-bionetworks/openchallenges-elasticsearch:{image_version}",
+        {
+            "bootstrap.memory_lock": "true",
+            "discovery.type": "single-node",  # https://stackoverflow.com/a/68253868
+        },
+        task_cpu=1024,
+        task_memory=4096,
+        jvm=JvmProps(heap_percentage=50),
+    )
+    return service_stack(stacks, "elasticsearch", props)
+
+
+def search_stack(stacks: StackRegistry) -> SearchStack:
+    return SearchStack(
+        app,
+        f"{stack_name_prefix}-search",
+        stacks["network"].vpc,
+        data_nodes=search_config.get("DATA_NODES", 2),
+        data_node_instance_type=search_config.get(
+            "DATA_NODE_INSTANCE_TYPE", "r6g.large.search"
+        ),
+        master_nodes=search_config.get("MASTER_NODES", 0),
+        master_node_instance_type=search_config.get(
+            "MASTER_NODE_INSTANCE_TYPE", "m6g.large.search"
+        ),
+        volume_size=search_config.get("VOLUME_SIZE", 30),
+        shards=search_config.get("SHARDS", 2),
+        replicas=search_config.get("REPLICAS", 1),
+    )
+
+
+if search_config:
+    registry.add("search", search_stack, depends_on=["network"])
+else:
+    registry.add(
+        "elasticsearch",
+        elasticsearch_stack,
+        depends_on=service_dependencies(["network", "ecs"]),
+    )
+
+
+def search_env_vars(stacks: StackRegistry) -> dict:
+    # the services default to the openchallenges-elasticsearch container
+    return stacks["search"].env_vars if search_config else {}
+
+
+def thumbor_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        f"ghcr.io/sage-bionetworks/openchallenges-thumbor:{image_version}",
+        {
+            "LOG_LEVEL": "info",
+            "PORT": "8889",
+            "LOADER": "thumbor_aws.loader",
+            "AWS_LOADER_REGION_NAME": "us-east-1",
+            "AWS_LOADER_BUCKET_NAME": stacks[
+                "buckets"
+            ].openchallenges_img_bucket.bucket_name,
+            "AWS_LOADER_S3_ENDPOINT_URL": stacks["network"].s3_endpoint_url,
+            "AWS_LOADER_ROOT_PATH": "img",
+            "STORAGE": "thumbor.storages.file_storage",
+            "FILE_STORAGE_ROOT_PATH": "/data/storage",
+            "RESULT_STORAGE": "thumbor.result_storages.file_storage",
+            "RESULT_STORAGE_FILE_STORAGE_ROOT_PATH": "/data/result_storage",
+            "RESULT_STORAGE_STORES_UNSAFE": "True",
+            "RESULT_STORAGE_EXPIRATION_SECONDS": "2629746",
+            "SECURITY_KEY": stacks.secrets["SECURITY_KEY"],
+            "ALLOW_UNSAFE_URL": "True",
+            "QUALITY": "100",
+            "MAX_AGE": str(thumbor_max_age),
+            "AUTO_PNG_TO_JPG": "True",
+            "HTTP_LOADER_VALIDATE_CERTS": "False",
+        },
+        task_cpu=512,
+        task_memory=1024,
+        # share the storage and result storage across tasks and restarts
+        shared_volume_path="/data",
+        auto_scaling=AutoScalingProps(
+            min_capacity=1,
+            max_capacity=3,
+            cpu_target_utilization=70,
+        ),
+        capacity=stateless_capacity,
+    )
+    return service_stack(stacks, "thumbor", props)
+
+
+registry.add(
+    "thumbor",
+    thumbor_stack,
+    depends_on=service_dependencies(["network", "ecs", "buckets"]),
+    secrets=["SECURITY_KEY"],
 )
-image_service_stack.add_dependency(service_registry_stack)
-image_service_stack.add_dependency(thumbor_stack)
-image_service_stack.add_dependency(zipkin_stack)
-
-challenge_service_props = ServiceProps(
-    "openchallenges-challenge-service",
-    8085,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-challenge-service:{image_version}",
-    {
-        "SERVER_PORT": "8085",
-        "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
-        "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
-        "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
-        "SPRING_DATASOURCE_USERNAME": "maria",
-        "SPRING_DATASOURCE_PASSWORD": secrets["MARIADB_PASSWORD"],
-        "DB_URL": "jdbc:mysql://openchallenges-mariadb:3306/challenge_service?allowLoadLocalInfile=true",
-        "DB_PLATFORMS_CSV_PATH": "/workspace/BOOT-INF/classes/db/platforms.csv",
-        "DB_CHALLENGES_CSV_PATH": "/workspace/BOOT-INF/classes/db/challenges.csv",
-        "DB_CONTRIBUTION_ROLES_CSV_PATH": "/workspace/BOOT-INF/classes/db/contribution_roles.csv",
-        "DB_INCENTIVES_CSV_PATH": "/workspace/BOOT-INF/classes/db/incentives.csv",
-        "DB_INPUT_DATA_TYPE_CSV_PATH": "/workspace/BOOT-INF/classes/db/input_data_type.csv",
-        "DB_SUBMISSION_TYPES_CSV_PATH": "/workspace/BOOT-INF/classes/db/submission_types.csv",
-        "DB_CATEGORIES_CSV_PATH": "/workspace/BOOT-INF/classes/db/categories.csv",
-        "DB_EDAM_CONCEPT_CSV_PATH": "/workspace/BOOT-INF/classes/db/edam_concept.csv",
-        "OPENCHALLENGES_CHALLENGE_SERVICE_IS_DEPLOYED_ON_AWS": "true",
-    },
+
+
+def config_server_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-config-server",
+        8090,
+        1792,
+        f"ghcr.io/sage-bionetworks/openchallenges-config-server:{image_version}",
+        {
+            "GIT_DEFAULT_LABEL": "test-2",
+            "GIT_HOST_KEY_ALGORITHM": "ssh-ed25519",
+            "GIT_HOST_KEY": stacks.secrets["GIT_HOST_KEY"],
+            "GIT_PRIVATE_KEY": stacks.secrets["GIT_PRIVATE_KEY"],
+            "GIT_URI": "git@github.com:Sage-Bionetworks/openchallenges-config-server-repository.git",
+            "SERVER_PORT": "8090",
+        },
+        task_cpu=1024,
+        task_memory=2048,
+        jvm=spring_jvm,
+    )
+    return service_stack(stacks, "config-server", props)
+
+
+registry.add(
+    "config-server",
+    config_server_stack,
+    depends_on=service_dependencies(["network", "ecs"]),
+    secrets=["GIT_HOST_KEY", "GIT_PRIVATE_KEY"],
 )
 
-challenge_service_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-challenge-service",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    challenge_service_props,
+
+def service_registry_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-service-registry",
+        8081,
+        1792,
+        f"ghcr.io/sage-bionetworks/openchallenges-service-registry:{image_version}",
+        {
+            "SERVER_PORT": "8081",
+            "DEFAULT_ZONE": "http://localhost:8081/eureka",
+            "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
+        },
+        task_cpu=1024,
+        task_memory=2048,
+        jvm=spring_jvm,
+        wait_for=[config_server_endpoint],
+    )
+    return service_stack(stacks, "service-registry", props)
+
+
+registry.add(
+    "service-registry",
+    service_registry_stack,
+    depends_on=service_dependencies(["network", "ecs", "config-server"]),
 )
-challenge_service_stack.add_dependency(service_registry_stack)
-challenge_service_stack.add_dependency(mariadb_stack)
-challenge_service_stack.add_dependency(elasticsearch_stack)
-challenge_service_stack.add_dependency(zipkin_stack)
-
-
-organization_service_props = ServiceProps(
-    "openchallenges-organization-service",
-    8084,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-organization-service:{image_version}",
-    {
-        "SERVER_PORT": "8084",
-        "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
-        "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
-        "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
-        "SPRING_DATASOURCE_USERNAME": "maria",
-        "SPRING_DATASOURCE_PASSWORD": secrets["MARIADB_PASSWORD"],
-        "DB_URL": "jdbc:mysql://openchallenges-mariadb:3306/organization_service?allowLoadLocalInfile=true",
-        "DB_ORGANIZATIONS_CSV_PATH": "/workspace/BOOT-INF/classes/db/organizations.csv",
-        "DB_CONTRIBUTION_ROLES_CSV_PATH": "/workspace/BOOT-INF/classes/db/contribution_roles.csv",
-        "OPENCHALLENGES_ORGANIZATION_SERVICE_IS_DEPLOYED_ON_AWS": "true",
-    },
+
+
+def zipkin_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-zipkin",
+        9411,
+        768,
+        f"ghcr.io/sage-bionetworks/openchallenges-zipkin:{image_version}",
+        {},
+        task_cpu=512,
+        task_memory=1024,
+        jvm=JvmProps(heap_percentage=50),
+    )
+    return service_stack(stacks, "zipkin", props)
+
+
+registry.add(
+    "zipkin", zipkin_stack, depends_on=service_dependencies(["network", "ecs"])
 )
 
-organization_service_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-organization-service",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    organization_service_props,
+
+def image_service_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-image-service",
+        8086,
+        1792,
+        f"ghcr.io/sage-bionetworks/openchallenges-image-service:{image_version}",
+        {
+            "SERVER_PORT": "8086",
+            "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
+            "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
+            "OPENCHALLENGES_IMAGE_SERVICE_THUMBOR_HOST": f"https://{fully_qualified_domain_name}/img/",
+            "OPENCHALLENGES_IMAGE_SERVICE_THUMBOR_SECURITY_KEY": stacks.secrets[
+                "SECURITY_KEY"
+            ],
+            "OPENCHALLENGES_IMAGE_SERVICE_IS_DEPLOYED_ON_AWS": "true",
+            **stacks["cache"].env_vars,
+        },
+        task_cpu=1024,
+        task_memory=2048,
+        jvm=spring_jvm,
+        wait_for=[config_server_endpoint, service_registry_endpoint],
+    )
+    return service_stack(stacks, "image-service", props)
+
+
+registry.add(
+    "image-service",
+    image_service_stack,
+    depends_on=service_dependencies(
+        ["network", "ecs", "service-registry", "thumbor", "zipkin", "cache"]
+    ),
+    secrets=["SECURITY_KEY"],
 )
-organization_service_stack.add_dependency(image_service_stack)
-organization_service_stack.add_dependency(mariadb_stack)
-organization_service_stack.add_dependency(elasticsearch_stack)
-organization_service_stack.add_dependency(zipkin_stack)
-
-api_gateway_props = ServiceProps(
-    "openchallenges-api-gateway",
-    8082,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-api-gateway:{image_version}",
-    {
-        "SERVER_PORT": "8082",
-        "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
-        "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
-        "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
-        "OPENCHALLENGES_API_GATEWAY_IS_DEPLOYED_ON_AWS": "true",
-    },
+
+
+def challenge_service_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-challenge-service",
+        8085,
+        2816,
+        f"ghcr.io/sage-bionetworks/openchallenges-challenge-service:{image_version}",
+        {
+            "SERVER_PORT": "8085",
+            "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
+            "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
+            "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
+            "SPRING_DATASOURCE_USERNAME": "maria",
+            "SPRING_DATASOURCE_PASSWORD": stacks.secrets["MARIADB_PASSWORD"],
+            "DB_URL": database_url(stacks, "challenge_service"),
+            "DB_PLATFORMS_CSV_PATH": "/workspace/BOOT-INF/classes/db/platforms.csv",
+            "DB_CHALLENGES_CSV_PATH": "/workspace/BOOT-INF/classes/db/challenges.csv",
+            "DB_CONTRIBUTION_ROLES_CSV_PATH": "/workspace/BOOT-INF/classes/db/contribution_roles.csv",
+            "DB_INCENTIVES_CSV_PATH": "/workspace/BOOT-INF/classes/db/incentives.csv",
+            "DB_INPUT_DATA_TYPE_CSV_PATH": "/workspace/BOOT-INF/classes/db/input_data_type.csv",
+            "DB_SUBMISSION_TYPES_CSV_PATH": "/workspace/BOOT-INF/classes/db/submission_types.csv",
+            "DB_CATEGORIES_CSV_PATH": "/workspace/BOOT-INF/classes/db/categories.csv",
+            "DB_EDAM_CONCEPT_CSV_PATH": "/workspace/BOOT-INF/classes/db/edam_concept.csv",
+            "OPENCHALLENGES_CHALLENGE_SERVICE_IS_DEPLOYED_ON_AWS": "true",
+            **stacks["cache"].env_vars,
+            **search_env_vars(stacks),
+        },
+        task_cpu=1024,
+        task_memory=3072,
+        auto_scaling=AutoScalingProps(
+            min_capacity=1,
+            max_capacity=3,
+            cpu_target_utilization=70,
+            memory_target_utilization=80,
+        ),
+        jvm=spring_jvm,
+        wait_for=[config_server_endpoint, service_registry_endpoint]
+        + storage_endpoints,
+    )
+    return service_stack(stacks, "challenge-service", props)
+
+
+registry.add(
+    "challenge-service",
+    challenge_service_stack,
+    depends_on=service_dependencies(
+        [
+            "network",
+            "ecs",
+            "service-registry",
+            database_stack_name,
+            search_stack_name,
+            "zipkin",
+            "cache",
+        ]
+    ),
+    secrets=["MARIADB_PASSWORD"],
 )
 
-api_gateway_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-api-gateway",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    api_gateway_props,
+
+def organization_service_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-organization-service",
+        8084,
+        2816,
+        f"ghcr.io/sage-bionetworks/openchallenges-organization-service:{image_version}",
+        {
+            "SERVER_PORT": "8084",
+            "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
+            "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
+            "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
+            "SPRING_DATASOURCE_USERNAME": "maria",
+            "SPRING_DATASOURCE_PASSWORD": stacks.secrets["MARIADB_PASSWORD"],
+            "DB_URL": database_url(stacks, "organization_service"),
+            "DB_ORGANIZATIONS_CSV_PATH": "/workspace/BOOT-INF/classes/db/organizations.csv",
+            "DB_CONTRIBUTION_ROLES_CSV_PATH": "/workspace/BOOT-INF/classes/db/contribution_roles.csv",
+            "OPENCHALLENGES_ORGANIZATION_SERVICE_IS_DEPLOYED_ON_AWS": "true",
+            **stacks["cache"].env_vars,
+            **search_env_vars(stacks),
+        },
+        task_cpu=1024,
+        task_memory=3072,
+        auto_scaling=AutoScalingProps(
+            min_capacity=1,
+            max_capacity=3,
+            cpu_target_utilization=70,
+            memory_target_utilization=80,
+        ),
+        jvm=spring_jvm,
+        wait_for=[config_server_endpoint, service_registry_endpoint]
+        + storage_endpoints,
+    )
+    return service_stack(stacks, "organization-service", props)
+
+
+registry.add(
+    "organization-service",
+    organization_service_stack,
+    depends_on=service_dependencies(
+        [
+            "network",
+            "ecs",
+            "service-registry",
+            database_stack_name,
+            search_stack_name,
+            "zipkin",
+            "cache",
+        ]
+    ),
+    secrets=["MARIADB_PASSWORD"],
 )
-api_gateway_stack.add_dependency(service_registry_stack)
-
-oc_app_props = ServiceProps(
-    "openchallenges-app",
-    4200,
-    1024,
-    f"ghcr.io/sage-bionetworks/openchallenges-app:{image_version}",
-    {
-        "API_DOCS_URL": f"https://{fully_qualified_domain_name}/api-docs",
-        "APP_VERSION": "1.0.0-alpha",
-        "CSR_API_URL": f"https://{fully_qualified_domain_name}/api/v1",
-        "DATA_UPDATED_ON": "2024-10-11",
-        "ENVIRONMENT": "production",
-        "GOOGLE_TAG_MANAGER_ID": "GTM-NBR5XD8C",
-        "SSR_API_URL": "http://openchallenges-api-gateway:8082/api/v1",
-    },
+
+
+def api_gateway_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-api-gateway",
+        8082,
+        2816,
+        f"ghcr.io/sage-bionetworks/openchallenges-api-gateway:{image_version}",
+        {
+            "SERVER_PORT": "8082",
+            "SPRING_CLOUD_CONFIG_URI": "http://openchallenges-config-server:8090",
+            "SERVICE_REGISTRY_URL": "http://openchallenges-service-registry:8081/eureka",
+            "KEYCLOAK_URL": "http://openchallenges-keycloak:8080",
+            "OPENCHALLENGES_API_GATEWAY_IS_DEPLOYED_ON_AWS": "true",
+        },
+        task_cpu=1024,
+        task_memory=3072,
+        auto_scaling=AutoScalingProps(
+            min_capacity=1,
+            max_capacity=3,
+            cpu_target_utilization=70,
+            memory_target_utilization=80,
+        ),
+        jvm=spring_jvm,
+        alarms=AlarmProps(response_time_p99=2, http_5xx_count=10),
+        wait_for=[config_server_endpoint, service_registry_endpoint],
+    )
+    return service_stack(stacks, "api-gateway", props)
+
+
+registry.add(
+    "api-gateway",
+    api_gateway_stack,
+    depends_on=service_dependencies(["network", "ecs", "service-registry"]),
 )
 
-oc_app_stack = ServiceStack(
-    app, f"{stack_name_prefix}-app", network_stack.vpc, ecs_stack.cluster, oc_app_props
+
+def oc_app_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-app",
+        4200,
+        1024,
+        f"ghcr.io/sage-bionetworks/openchallenges-app:{image_version}",
+        {
+            "API_DOCS_URL": f"https://{fully_qualified_domain_name}/api-docs",
+            "APP_VERSION": "1.0.0-alpha",
+            "CSR_API_URL": f"https://{fully_qualified_domain_name}/api/v1",
+            "DATA_UPDATED_ON": "2024-10-11",
+            "ENVIRONMENT": "production",
+            "GOOGLE_TAG_MANAGER_ID": "GTM-NBR5XD8C",
+            "SSR_API_URL": "http://openchallenges-api-gateway:8082/api/v1",
+        },
+        task_cpu=512,
+        task_memory=2048,
+        capacity=stateless_capacity,
+    )
+    return service_stack(stacks, "app", props)
+
+
+registry.add(
+    "app",
+    oc_app_stack,
+    depends_on=service_dependencies(
+        [
+            "network",
+            "ecs",
+            "organization-service",
+            "api-gateway",
+            "challenge-service",
+            "image-service",
+        ]
+    ),
 )
-oc_app_stack.add_dependency(organization_service_stack)
-oc_app_stack.add_dependency(api_gateway_stack)
-oc_app_stack.add_dependency(challenge_service_stack)
-oc_app_stack.add_dependency(image_service_stack)
+
 
 # From AWS docs https://docs.aws.amazon.com/AmazonECS/latest/developerguide/service-connect-concepts-deploy.html
 # The public discovery and reachability should be created last by AWS CloudFormation, including the frontend
 # client service. The services need to be created in this order to prevent an time period when the frontend
 # client service is running and available the public, but a backend isn't.
-load_balancer_stack = LoadBalancerStack(
-    app, f"{stack_name_prefix}-load-balancer", network_stack.vpc
-)
+def load_balancer_stack(stacks: StackRegistry) -> LoadBalancerStack:
+    return LoadBalancerStack(
+        app, f"{stack_name_prefix}-load-balancer", stacks["network"].vpc
+    )
+
+
+registry.add("load-balancer", load_balancer_stack, depends_on=["network"])
 
-api_docs_props = ServiceProps(
-    "openchallenges-api-docs",
-    8010,
-    256,
-    f"ghcr.io/sage-bionetworks/openchallenges-api-docs:{image_version}",
-    {"PORT": "8010"},
+
+def api_docs_stack(stacks: StackRegistry) -> ServiceStack:
+    props = ServiceProps(
+        "openchallenges-api-docs",
+        8010,
+        256,
+        f"ghcr.io/sage-bionetworks/openchallenges-api-docs:{image_version}",
+        {"PORT": "8010"},
+        task_cpu=256,
+        task_memory=512,
+        # the api docs are static, interruptions are acceptable
+        capacity=CapacityProps(on_demand_weight=0, spot_weight=1),
+    )
+    return service_stack(stacks, "api-docs", props)
+
+
+registry.add(
+    "api-docs", api_docs_stack, depends_on=service_dependencies(["network", "ecs"])
 )
-api_docs_stack = ServiceStack(
-    app,
-    f"{stack_name_prefix}-api-docs",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    api_docs_props,
+
+
+def apex_service_stack(stacks: StackRegistry) -> LoadBalancedServiceStack:
+    props = ServiceProps(
+        "openchallenges-apex",
+        8000,
+        200,
+        f"ghcr.io/sage-bionetworks/openchallenges-apex:{image_version}",
+        {
+            "API_DOCS_HOST": "openchallenges-api-docs",
+            "API_DOCS_PORT": "8010",
+            "API_GATEWAY_HOST": "openchallenges-api-gateway",
+            "API_GATEWAY_PORT": "8082",
+            "APP_HOST": "openchallenges-app",
+            "APP_PORT": "4200",
+            "THUMBOR_HOST": "openchallenges-thumbor",
+            "THUMBOR_PORT": "8889",
+            "ZIPKIN_HOST": "openchallenges-zipkin",
+            "ZIPKIN_PORT": "9411",
+        },
+        task_cpu=256,
+        task_memory=512,
+        auto_scaling=AutoScalingProps(
+            min_capacity=1,
+            max_capacity=4,
+            cpu_target_utilization=70,
+            requests_per_target=1000,
+        ),
+        alarms=AlarmProps(response_time_p99=1, http_5xx_count=10),
+        deployment=DeploymentProps(health_check_grace_period=60),
+    )
+    return LoadBalancedServiceStack(
+        app,
+        f"{stack_name_prefix}-apex",
+        stacks["network"].vpc,
+        stacks["ecs"].cluster,
+        props,
+        stacks["load-balancer"].alb,
+        certificate_arn,
+        load_balancing=LoadBalancingProps(
+            health_check_path="/health",
+            health_check_interval=10,
+            healthy_threshold=2,
+            unhealthy_threshold=3,
+            # nginx drains its requests quickly, spread them on the least busy task
+            deregistration_delay=30,
+            least_outstanding_requests=True,
+        ),
+        registry_cache=registry_cache(stacks),
+    )
+
+
+registry.add(
+    "apex",
+    apex_service_stack,
+    depends_on=service_dependencies(
+        ["network", "ecs", "app", "api-docs", "load-balancer"]
+    ),
 )
 
-apex_service_props = ServiceProps(
-    "openchallenges-apex",
-    8000,
-    200,
-    f"ghcr.io/sage-bionetworks/openchallenges-apex:{image_version}",
-    {
-        "API_DOCS_HOST": "openchallenges-api-docs",
-        "API_DOCS_PORT": "8010",
-        "API_GATEWAY_HOST": "openchallenges-api-gateway",
-        "API_GATEWAY_PORT": "8082",
-        "APP_HOST": "openchallenges-app",
-        "APP_PORT": "4200",
-        "THUMBOR_HOST": "openchallenges-thumbor",
-        "THUMBOR_PORT": "8889",
-        "ZIPKIN_HOST": "openchallenges-zipkin",
-        "ZIPKIN_PORT": "9411",
-    },
+
+# serve thumbor images from CloudFront edge caches
+def cdn_stack(stacks: StackRegistry) -> CdnStack:
+    return CdnStack(
+        app,
+        f"{stack_name_prefix}-cdn",
+        stacks["load-balancer"].alb,
+        fully_qualified_domain_name,
+        certificate_arn,
+        thumbor_max_age,
+    )
+
+
+registry.add("cdn", cdn_stack, depends_on=["load-balancer", "apex"])
+
+
+# render the thumbnails of new images and of all images after a thumbor deployment
+def image_prewarm_stack(stacks: StackRegistry) -> ImagePrewarmStack:
+    return ImagePrewarmStack(
+        app,
+        f"{stack_name_prefix}-image-prewarm",
+        stacks["buckets"].openchallenges_img_bucket,
+        stacks["thumbor"].service,
+        f"https://{fully_qualified_domain_name}/img",
+        stacks.secrets["SECURITY_KEY"],
+    )
+
+
+registry.add(
+    "image-prewarm",
+    image_prewarm_stack,
+    depends_on=["buckets", "thumbor"],
+    secrets=["SECURITY_KEY"],
 )
 
-apex_service_stack = LoadBalancedServiceStack(
-    app,
-    f"{stack_name_prefix}-apex",
-    network_stack.vpc,
-    ecs_stack.cluster,
-    apex_service_props,
-    load_balancer_stack.alb,
-    certificate_arn,
-    health_check_path="/health",
-    health_check_interval=5,
+# the ECS services, the database and search stacks replace the mariadb and elasticsearch services
+service_stack_names = [
+    name
+    for name in [
+        "mariadb",
+        "elasticsearch",
+        "thumbor",
+        "config-server",
+        "service-registry",
+        "zipkin",
+        "image-service",
+        "challenge-service",
+        "organization-service",
+        "api-gateway",
+        "app",
+        "api-docs",
+        "apex",
+    ]
+    if name in registry.names
+]
+
+
+# dashboards and alarms of the ECS services
+def observability_stack(stacks: StackRegistry) -> ObservabilityStack:
+    return ObservabilityStack(
+        app,
+        f"{stack_name_prefix}-observability",
+        [stacks[name] for name in service_stack_names],
+    )
+
+
+registry.add("observability", observability_stack, depends_on=service_stack_names)
+
+# construct the selected stacks and get the secrets they use from cdk.json or aws parameter store
+registry.build(
+    lambda names: utils.get_secrets(app, names),
+    utils.get_selected_stacks(app, stack_name_prefix),
 )
-apex_service_stack.add_dependency(oc_app_stack)
-apex_service_stack.add_dependency(api_docs_stack)
-apex_service_stack.add_dependency(load_balancer_stack)
 
 app.synth()
@@ -22,6 +22,8 @@ class BucketStack(cdk.Stack):
             # TODO: do we need specific bucket name?
             # bucket_name="openchallenges-img",    # name is unique within a region
             object_ownership=s3.ObjectOwnership.BUCKET_OWNER_ENFORCED,
+            # send the object events to EventBridge (see ImagePrewarmStack)
+            event_bridge_enabled=True,
         )
         cdk.CfnOutput(
             self,
@@ -0,0 +1,80 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_elasticache as elasticache,
+)
+
+from constructs import Construct
+
+VALKEY_PORT = 6379
+
+
+class CacheStack(cdk.Stack):
+    """
+    ElastiCache Valkey cache shared by the services
+
+    vpc: the VPC to run the cache in (private subnets)
+    node_type: the cache node type
+    replicas: the number of read replicas, with at least one replica the primary
+      automatically fails over to a replica in another availability zone
+    engine_version: the Valkey engine version
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        node_type: str = "cache.t4g.small",
+        replicas: int = 1,
+        engine_version: str = "7.2",
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.security_group = ec2.SecurityGroup(self, "SecurityGroup", vpc=vpc)
+        self.security_group.add_ingress_rule(
+            peer=ec2.Peer.ipv4(vpc.vpc_cidr_block),
+            connection=ec2.Port.tcp(VALKEY_PORT),
+        )
+
+        subnet_group = elasticache.CfnSubnetGroup(
+            self,
+            "SubnetGroup",
+            description=f"{construct_id} subnets",
+            subnet_ids=vpc.select_subnets(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ).subnet_ids,
+        )
+
+        self.replication_group = elasticache.CfnReplicationGroup(
+            self,
+            "ReplicationGroup",
+            replication_group_description=f"{construct_id} cache",
+            engine="valkey",
+            engine_version=engine_version,
+            cache_node_type=node_type,
+            num_node_groups=1,
+            replicas_per_node_group=replicas,
+            automatic_failover_enabled=replicas > 0,
+            multi_az_enabled=replicas > 0,
+            port=VALKEY_PORT,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[self.security_group.security_group_id],
+            at_rest_encryption_enabled=True,
+            transit_encryption_enabled=True,
+        )
+
+        # environment variables pointing the Spring services to the cache
+        self.env_vars = {
+            "SPRING_DATA_REDIS_HOST": self.replication_group.attr_primary_end_point_address,
+            "SPRING_DATA_REDIS_PORT": self.replication_group.attr_primary_end_point_port,
+            "SPRING_DATA_REDIS_SSL_ENABLED": "true",
+        }
+
+        cdk.CfnOutput(
+            self,
+            "PrimaryEndpoint",
+            value=self.replication_group.attr_primary_end_point_address,
+        )
@@ -0,0 +1,85 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    Duration as duration,
+    aws_certificatemanager as acm,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_elasticloadbalancingv2 as elbv2,
+)
+
+from constructs import Construct
+
+IMAGE_PATH_PATTERN = "/img/*"
+API_PATH_PATTERN = "/api/*"
+
+
+class CdnStack(cdk.Stack):
+    """
+    CloudFront distribution in front of the application load balancer.
+
+    Thumbor images (/img/*) are cached at the edge for the thumbor `MAX_AGE`,
+    all other paths (API, app, docs) are passed straight through to the load balancer.
+    The FQDN DNS record must point to the distribution to serve traffic through it.
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        load_balancer: elbv2.ApplicationLoadBalancer,
+        fully_qualified_domain_name: str,
+        certificate_arn: str,
+        image_max_age: int,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # CloudFront validates the ALB certificate against the forwarded Host header
+        origin = origins.LoadBalancerV2Origin(
+            load_balancer,
+            protocol_policy=cloudfront.OriginProtocolPolicy.HTTPS_ONLY,
+        )
+
+        image_cache_policy = cloudfront.CachePolicy(
+            self,
+            "ImageCachePolicy",
+            comment="Cache thumbor images for the thumbor MAX_AGE",
+            default_ttl=duration.seconds(image_max_age),
+            max_ttl=duration.seconds(image_max_age),
+            min_ttl=duration.seconds(0),
+            header_behavior=cloudfront.CacheHeaderBehavior.allow_list("Host"),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.none(),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+        )
+
+        pass_through = cloudfront.BehaviorOptions(
+            origin=origin,
+            viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+            cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+            origin_request_policy=cloudfront.OriginRequestPolicy.ALL_VIEWER,
+        )
+
+        self.distribution = cloudfront.Distribution(
+            self,
+            "Distribution",
+            comment=fully_qualified_domain_name,
+            domain_names=[fully_qualified_domain_name],
+            certificate=acm.Certificate.from_certificate_arn(
+                self, "Cert", certificate_arn=certificate_arn
+            ),
+            http_version=cloudfront.HttpVersion.HTTP2_AND_3,
+            price_class=cloudfront.PriceClass.PRICE_CLASS_100,
+            default_behavior=pass_through,
+            additional_behaviors={
+                IMAGE_PATH_PATTERN: cloudfront.BehaviorOptions(
+                    origin=origin,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+                    cache_policy=image_cache_policy,
+                ),
+                API_PATH_PATTERN: pass_through,
+            },
+        )
+        cdk.CfnOutput(self, "dns", value=self.distribution.distribution_domain_name)
@@ -0,0 +1,115 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_rds as rds,
+    aws_secretsmanager as secretsmanager,
+)
+
+from constructs import Construct
+
+MYSQL_PORT = 3306
+
+
+class DatabaseStack(cdk.Stack):
+    """
+    Aurora MySQL cluster, with reader replicas, behind an RDS Proxy
+
+    vpc: the VPC to run the database in (private subnets)
+    username: the database user of the services
+    password: the database user password
+    instance_type: the instance type of the writer and readers (i.e. r6g.large)
+    readers: the number of reader replicas, read only transactions are spread across them
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        username: str,
+        password: str,
+        instance_type: str = "t4g.medium",
+        readers: int = 1,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.security_group = ec2.SecurityGroup(self, "SecurityGroup", vpc=vpc)
+        self.security_group.add_ingress_rule(
+            peer=ec2.Peer.ipv4(vpc.vpc_cidr_block),
+            connection=ec2.Port.tcp(MYSQL_PORT),
+        )
+
+        # RDS Proxy reads the database credentials from Secrets Manager
+        self.secret = secretsmanager.Secret(
+            self,
+            "Secret",
+            secret_object_value={
+                "username": cdk.SecretValue.unsafe_plain_text(username),
+                "password": cdk.SecretValue.unsafe_plain_text(password),
+            },
+        )
+
+        instance = ec2.InstanceType(instance_type)
+        self.cluster = rds.DatabaseCluster(
+            self,
+            "Cluster",
+            engine=rds.DatabaseClusterEngine.aurora_mysql(
+                version=rds.AuroraMysqlEngineVersion.VER_3_05_2
+            ),
+            credentials=rds.Credentials.from_secret(self.secret),
+            writer=rds.ClusterInstance.provisioned("Writer", instance_type=instance),
+            readers=[
+                rds.ClusterInstance.provisioned(f"Reader{i}", instance_type=instance)
+                for i in range(1, readers + 1)
+            ],
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+            security_groups=[self.security_group],
+            storage_encrypted=True,
+            removal_policy=cdk.RemovalPolicy.SNAPSHOT,
+        )
+
+        # pool the service connections, the proxy endpoint targets the writer and
+        # the read only endpoint the readers
+        self.proxy = self.cluster.add_proxy(
+            "Proxy",
+            secrets=[self.secret],
+            vpc=vpc,
+            security_groups=[self.security_group],
+        )
+        self.writer_endpoint = self.proxy.endpoint
+        self.reader_endpoint = None
+        if readers > 0:
+            reader_endpoint = rds.CfnDBProxyEndpoint(
+                self,
+                "ProxyReaderEndpoint",
+                db_proxy_name=self.proxy.db_proxy_name,
+                db_proxy_endpoint_name=f"{construct_id}-reader",
+                vpc_subnet_ids=vpc.select_subnets(
+                    subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+                ).subnet_ids,
+                vpc_security_group_ids=[self.security_group.security_group_id],
+                target_role="READ_ONLY",
+            )
+            self.reader_endpoint = reader_endpoint.attr_endpoint
+
+        cdk.CfnOutput(self, "WriterEndpoint", value=self.writer_endpoint)
+
+    def jdbc_url(self, database: str, parameters: str = "") -> str:
+        """
+        The Connector/J URL of a database, with readers the replication protocol sends
+        read only transactions to the reader endpoint and the others to the writer
+        """
+        query = "sslMode=REQUIRED" + (f"&{parameters}" if parameters else "")
+        if self.reader_endpoint is None:
+            return (
+                f"jdbc:mysql://{self.writer_endpoint}:{MYSQL_PORT}/{database}?{query}"
+            )
+        return (
+            f"jdbc:mysql:replication://{self.writer_endpoint}:{MYSQL_PORT},"
+            f"{self.reader_endpoint}:{MYSQL_PORT}/{database}?{query}"
+        )
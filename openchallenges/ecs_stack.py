@@ -27,6 +27,8 @@ class EcsStack(cdk.Stack):
             self,
             "Cluster",
             vpc=vpc,
+            enable_fargate_capacity_providers=True,
+            container_insights=True,
             default_cloud_map_namespace=ecs.CloudMapNamespaceOptions(
                 name=namespace,
                 use_for_service_connect=True,
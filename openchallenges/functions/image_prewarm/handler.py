@@ -0,0 +1,88 @@
+"""
+Pre-warm the thumbor result storage and the CDN with the thumbnails of the bucket images.
+
+A new object under the root path warms the thumbnails of that image, any other event (a
+thumbor deployment) warms the thumbnails of every image in the bucket.
+"""
+
+import base64
+import concurrent.futures
+import hashlib
+import hmac
+import logging
+import os
+import urllib.parse
+import urllib.request
+
+import boto3
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def sign(security_key: str, path: str) -> str:
+    """The thumbor HMAC-SHA1 signature of an URL path"""
+    digest = hmac.new(security_key.encode(), path.encode(), hashlib.sha1).digest()
+    return base64.urlsafe_b64encode(digest).decode()
+
+
+def thumbnail_urls(base_url: str, security_key: str, image: str, sizes: list) -> list:
+    image = urllib.parse.quote(image, safe="/")
+    urls = []
+    for size in sizes:
+        path = f"{size}/{image}"
+        urls.append(f"{base_url.rstrip('/')}/{sign(security_key, path)}/{path}")
+    return urls
+
+
+def list_images(s3, bucket: str, prefix: str) -> list:
+    keys = []
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    while True:
+        response = s3.list_objects_v2(**kwargs)
+        keys += [obj["Key"] for obj in response.get("Contents", []) if obj["Size"] > 0]
+        if not response.get("IsTruncated"):
+            return keys
+        kwargs["ContinuationToken"] = response["NextContinuationToken"]
+
+
+def fetch(url: str) -> bool:
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+        return True
+    except OSError as error:
+        logger.warning("Failed to pre-warm %s: %s", url, error)
+        return False
+
+
+def prewarm(urls: list, concurrency: int) -> dict:
+    """Request the URLs with at most `concurrency` requests in flight"""
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    return {"requested": len(results), "failed": results.count(False)}
+
+
+def on_event(event, context):
+    bucket = os.environ["BUCKET_NAME"]
+    root_path = os.environ["ROOT_PATH"].strip("/") + "/"
+
+    if event.get("source") == "aws.s3":
+        keys = [event["detail"]["object"]["key"]]
+    else:
+        keys = list_images(boto3.client("s3"), bucket, root_path)
+
+    sizes = os.environ["THUMBNAIL_SIZES"].split(",")
+    urls = []
+    for key in keys:
+        if key.startswith(root_path):
+            urls += thumbnail_urls(
+                os.environ["BASE_URL"],
+                os.environ["SECURITY_KEY"],
+                key[len(root_path) :],
+                sizes,
+            )
+
+    result = prewarm(urls, int(os.environ["CONCURRENCY"]))
+    logger.info("Pre-warmed the thumbnails of %d images: %s", len(keys), result)
+    return result
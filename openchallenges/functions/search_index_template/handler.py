@@ -0,0 +1,45 @@
+"""
+Custom resource handler creating an index template in a search domain, so the indices
+created by the services get the configured number of shards and replicas.
+"""
+
+import json
+import urllib.error
+import urllib.request
+
+
+def request(method: str, url: str, body: dict = None) -> None:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(
+        url, data=data, method=method, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=30) as response:
+        response.read()
+
+
+def on_event(event, context):
+    props = event["ResourceProperties"]
+    url = f"https://{props['Endpoint']}/_index_template/{props['Name']}"
+
+    if event["RequestType"] == "Delete":
+        try:
+            request("DELETE", url)
+        except urllib.error.HTTPError as error:
+            if error.code != 404:
+                raise
+        return {"PhysicalResourceId": event["PhysicalResourceId"]}
+
+    request(
+        "PUT",
+        url,
+        {
+            "index_patterns": props["IndexPatterns"],
+            "template": {
+                "settings": {
+                    "number_of_shards": int(props["Shards"]),
+                    "number_of_replicas": int(props["Replicas"]),
+                }
+            },
+        },
+    )
+    return {"PhysicalResourceId": props["Name"]}
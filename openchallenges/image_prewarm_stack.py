@@ -0,0 +1,101 @@
+import os
+
+import aws_cdk as cdk
+
+from aws_cdk import (
+    Duration as duration,
+    aws_ecs as ecs,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_lambda as lambda_,
+    aws_s3 as s3,
+)
+
+from constructs import Construct
+
+PREWARM_FUNCTION_PATH = os.path.join(
+    os.path.dirname(__file__), "functions", "image_prewarm"
+)
+
+
+class ImagePrewarmStack(cdk.Stack):
+    """
+    Pre-warm the thumbor thumbnails of the bucket images, so the first visitors don't pay
+    the resize latency.
+
+    A function requests the signed thumbor URLs of the thumbnail sizes of a new image
+    uploaded to the bucket, and of every image in the bucket when a thumbor deployment
+    completes.  The requests go through the public URL and also fill the CDN cache.
+
+    bucket: the image bucket thumbor loads the images from
+    service: the thumbor ECS service
+    base_url: the public thumbor URL (i.e. https://openchallenges.io/img)
+    security_key: the thumbor SECURITY_KEY signing the URLs
+    root_path: the bucket prefix of the images (thumbor AWS_LOADER_ROOT_PATH)
+    sizes: the thumbnail sizes (thumbor `<width>x<height>` URL part) to render, they must
+      match the image service URLs to warm the cache the visitors hit
+    concurrency: the maximum number of requests in flight
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        bucket: s3.IBucket,
+        service: ecs.IBaseService,
+        base_url: str,
+        security_key: str,
+        root_path: str = "img",
+        sizes: list = None,
+        concurrency: int = 8,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        sizes = sizes or ["0x32", "0x100", "0x140", "0x250", "0x500"]
+        if concurrency < 1:
+            raise ValueError(f"{construct_id} concurrency must be at least 1")
+
+        self.function = lambda_.Function(
+            self,
+            "Function",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.on_event",
+            code=lambda_.Code.from_asset(PREWARM_FUNCTION_PATH),
+            timeout=duration.minutes(15),
+            environment={
+                "BUCKET_NAME": bucket.bucket_name,
+                "ROOT_PATH": root_path,
+                "BASE_URL": base_url,
+                "SECURITY_KEY": security_key,
+                "THUMBNAIL_SIZES": ",".join(sizes),
+                "CONCURRENCY": str(concurrency),
+            },
+        )
+        bucket.grant_read(self.function, f"{root_path}/*")
+
+        # the bucket sends its object events to EventBridge (see BucketStack)
+        events.Rule(
+            self,
+            "ImageUploadedRule",
+            event_pattern=events.EventPattern(
+                source=["aws.s3"],
+                detail_type=["Object Created"],
+                detail={
+                    "bucket": {"name": [bucket.bucket_name]},
+                    "object": {"key": [{"prefix": f"{root_path}/"}]},
+                },
+            ),
+            targets=[targets.LambdaFunction(self.function)],
+        )
+        events.Rule(
+            self,
+            "DeploymentCompletedRule",
+            event_pattern=events.EventPattern(
+                source=["aws.ecs"],
+                detail_type=["ECS Deployment State Change"],
+                resources=[service.service_arn],
+                detail={"eventName": ["SERVICE_DEPLOYMENT_COMPLETED"]},
+            ),
+            targets=[targets.LambdaFunction(self.function)],
+        )
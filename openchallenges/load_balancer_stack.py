@@ -11,14 +11,34 @@ from constructs import Construct
 class LoadBalancerStack(cdk.Stack):
     """
     API Gateway to allow access to ECS app from the internet
+
+    idle_timeout: seconds a client connection can stay idle before it is closed (1-4000)
+    http2: accept HTTP/2 client connections, multiplexing the requests of a client over
+      a single connection
     """
 
     def __init__(
-        self, scope: Construct, construct_id: str, vpc: ec2.Vpc, **kwargs
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        idle_timeout: int = 60,
+        http2: bool = True,
+        **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        if not 1 <= idle_timeout <= 4000:
+            raise ValueError(
+                f"Idle timeout {idle_timeout} must be between 1 and 4000 seconds"
+            )
+
         self.alb = elbv2.ApplicationLoadBalancer(
-            self, "AppLoadBalancer", vpc=vpc, internet_facing=True
+            self,
+            "AppLoadBalancer",
+            vpc=vpc,
+            internet_facing=True,
+            idle_timeout=cdk.Duration.seconds(idle_timeout),
+            http2_enabled=http2,
         )
         cdk.CfnOutput(self, "dns", value=self.alb.load_balancer_dns_name)
@@ -4,18 +4,80 @@ from aws_cdk import aws_ec2 as ec2
 
 from constructs import Construct
 
+# interface VPC endpoints, keyed by name, used by the ECS services
+INTERFACE_ENDPOINT_SERVICES = {
+    "ecr": ec2.InterfaceVpcEndpointAwsService.ECR,
+    "ecr-docker": ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+    "logs": ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+    "ssm": ec2.InterfaceVpcEndpointAwsService.SSM,
+    "ssmmessages": ec2.InterfaceVpcEndpointAwsService.SSM_MESSAGES,
+}
+
 
 class NetworkStack(cdk.Stack):
     """
     Network for applications
+
+    vpc_cidr: the VPC CIDR block
+    s3_gateway_endpoint: create an S3 gateway endpoint, S3 traffic from the private subnets
+      is routed to it instead of the NAT gateways
+    interface_endpoints: the names of the interface endpoints to create in the private subnets
+      (keys of INTERFACE_ENDPOINT_SERVICES), None for all of them, [] for none
     """
 
-    def __init__(self, scope: Construct, construct_id: str, vpc_cidr, **kwargs) -> None:
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc_cidr,
+        s3_gateway_endpoint: bool = True,
+        interface_endpoints: list = None,
+        **kwargs,
+    ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        if interface_endpoints is None:
+            interface_endpoints = list(INTERFACE_ENDPOINT_SERVICES)
+        unknown_endpoints = set(interface_endpoints) - set(INTERFACE_ENDPOINT_SERVICES)
+        if unknown_endpoints:
+            raise ValueError(
+                f"Unknown VPC interface endpoints {', '.join(sorted(unknown_endpoints))}"
+            )
+
         # -------------------
         # create a VPC
         # -------------------
         self.vpc = ec2.Vpc(
             self, "Vpc", max_azs=2, ip_addresses=ec2.IpAddresses.cidr(vpc_cidr)
         )
+
+        # the S3 regional endpoint resolves to the gateway endpoint, when there is one,
+        # from inside the VPC
+        self.s3_endpoint_url = f"http://s3.{self.region}.{self.url_suffix}"
+        self.s3_endpoint = None
+        if s3_gateway_endpoint:
+            self.s3_endpoint = self.vpc.add_gateway_endpoint(
+                "S3Endpoint", service=ec2.GatewayVpcEndpointAwsService.S3
+            )
+
+        # interface endpoints with their own security group only open to the VPC over HTTPS
+        self.interface_endpoints = {}
+        for name in interface_endpoints:
+            construct_name = "".join(part.title() for part in name.split("-"))
+            security_group = ec2.SecurityGroup(
+                self,
+                f"{construct_name}EndpointSecurityGroup",
+                vpc=self.vpc,
+                description=f"{name} VPC endpoint",
+                allow_all_outbound=False,
+            )
+            security_group.add_ingress_rule(
+                peer=ec2.Peer.ipv4(self.vpc.vpc_cidr_block),
+                connection=ec2.Port.tcp(443),
+            )
+            self.interface_endpoints[name] = self.vpc.add_interface_endpoint(
+                f"{construct_name}Endpoint",
+                service=INTERFACE_ENDPOINT_SERVICES[name],
+                security_groups=[security_group],
+                open=False,
+            )
@@ -0,0 +1,173 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    Duration as duration,
+    aws_cloudwatch as cloudwatch,
+    aws_cloudwatch_actions as cloudwatch_actions,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_sns as sns,
+)
+
+from constructs import Construct
+
+from openchallenges.service_stack import ServiceStack
+
+DASHBOARD_WIDGET_WIDTH = 12
+
+
+class ObservabilityStack(cdk.Stack):
+    """
+    CloudWatch dashboard and alarms of each ECS service
+
+    Each service dashboard shows the CPU and memory utilization, the running task count
+    (Container Insights) and the Service Connect requests, response time and 5xx responses.
+    Services fronted by a load balancer also show the load balancer response time and 5xx
+    responses.  The alarm thresholds are set by the service AlarmProps, alarms are sent to
+    the `alarm_topic` SNS topic.
+
+    services: the ECS service stacks to observe
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        services: list,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.alarm_topic = sns.Topic(self, "AlarmTopic")
+        self.dashboards = {}
+        for service in services:
+            self._add_service(service)
+
+        cdk.CfnOutput(self, "AlarmTopicArn", value=self.alarm_topic.topic_arn)
+
+    def _add_service(self, service: ServiceStack) -> None:
+        props = service.props
+        name = props.container_name
+        period = duration.seconds(props.alarms.period)
+        dimensions = {
+            "ClusterName": service.cluster.cluster_name,
+            "ServiceName": service.service.service_name,
+        }
+
+        def service_connect_metric(metric_name, statistic):
+            return cloudwatch.Metric(
+                namespace="AWS/ECS",
+                metric_name=metric_name,
+                dimensions_map={**dimensions, "DiscoveryName": name},
+                statistic=statistic,
+                period=period,
+            )
+
+        cpu = service.service.metric_cpu_utilization(period=period)
+        memory = service.service.metric_memory_utilization(period=period)
+        running_tasks = cloudwatch.Metric(
+            namespace="ECS/ContainerInsights",
+            metric_name="RunningTaskCount",
+            dimensions_map=dimensions,
+            statistic="Average",
+            period=period,
+        )
+        requests = service_connect_metric("RequestCount", "Sum")
+        response_time = {
+            statistic: service_connect_metric("TargetResponseTime", statistic)
+            for statistic in ["p50", "p99"]
+        }
+        errors = service_connect_metric("HTTPCode_Target_5XX_Count", "Sum")
+
+        widgets = [
+            cloudwatch.GraphWidget(
+                title="CPU and memory utilization (%)",
+                left=[cpu, memory],
+                width=DASHBOARD_WIDGET_WIDTH,
+            ),
+            cloudwatch.GraphWidget(
+                title="Running tasks",
+                left=[running_tasks],
+                width=DASHBOARD_WIDGET_WIDTH,
+            ),
+            cloudwatch.GraphWidget(
+                title="Service Connect requests and 5xx",
+                left=[requests],
+                right=[errors],
+                width=DASHBOARD_WIDGET_WIDTH,
+            ),
+            cloudwatch.GraphWidget(
+                title="Service Connect response time (ms)",
+                left=list(response_time.values()),
+                width=DASHBOARD_WIDGET_WIDTH,
+            ),
+        ]
+
+        alarms = props.alarms
+        self._alarm(name, "Cpu", cpu, alarms.cpu_utilization, alarms)
+        self._alarm(name, "Memory", memory, alarms.memory_utilization, alarms)
+        if alarms.response_time_p99 is not None:
+            # Service Connect reports the response time in milliseconds
+            self._alarm(
+                name,
+                "ResponseTime",
+                response_time["p99"],
+                alarms.response_time_p99 * 1000,
+                alarms,
+            )
+        self._alarm(name, "5xx", errors, alarms.http_5xx_count, alarms)
+
+        if service.target_group is not None:
+            target_group_metrics = service.target_group.metrics
+            lb_response_time = {
+                statistic: target_group_metrics.target_response_time(
+                    statistic=statistic, period=period
+                )
+                for statistic in ["p50", "p99"]
+            }
+            lb_errors = target_group_metrics.http_code_target(
+                elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=period
+            )
+            widgets += [
+                cloudwatch.GraphWidget(
+                    title="Load balancer response time (s)",
+                    left=list(lb_response_time.values()),
+                    width=DASHBOARD_WIDGET_WIDTH,
+                ),
+                cloudwatch.GraphWidget(
+                    title="Load balancer 5xx",
+                    left=[lb_errors],
+                    width=DASHBOARD_WIDGET_WIDTH,
+                ),
+            ]
+            self._alarm(
+                name,
+                "LoadBalancerResponseTime",
+                lb_response_time["p99"],
+                alarms.response_time_p99,
+                alarms,
+            )
+            self._alarm(
+                name, "LoadBalancer5xx", lb_errors, alarms.http_5xx_count, alarms
+            )
+
+        # the service stack names are unique across environments
+        dashboard = cloudwatch.Dashboard(
+            self, f"{name}-dashboard", dashboard_name=service.stack_name
+        )
+        for i in range(0, len(widgets), 2):
+            dashboard.add_widgets(*widgets[i : i + 2])
+        self.dashboards[name] = dashboard
+
+    def _alarm(self, name, alarm_name, metric, threshold, alarms) -> None:
+        if threshold is None:
+            return
+        alarm = cloudwatch.Alarm(
+            self,
+            f"{name}-{alarm_name}Alarm",
+            metric=metric,
+            threshold=threshold,
+            evaluation_periods=alarms.evaluation_periods,
+            comparison_operator=cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=cloudwatch.TreatMissingData.NOT_BREACHING,
+        )
+        alarm.add_alarm_action(cloudwatch_actions.SnsAction(self.alarm_topic))
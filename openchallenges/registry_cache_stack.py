@@ -0,0 +1,83 @@
+import aws_cdk as cdk
+
+from aws_cdk import (
+    aws_ecr as ecr,
+    aws_iam as iam,
+)
+
+from constructs import Construct
+
+GHCR_REGISTRY_URL = "ghcr.io"
+GHCR_UPSTREAM_REGISTRY = "github-container-registry"
+
+
+class RegistryCacheStack(cdk.Stack):
+    """
+    ECR pull through cache of a container registry, images are pulled from the upstream
+    registry the first time they are requested and from the in-region ECR cache afterwards
+
+    credential_arn: the ARN of the Secrets Manager secret holding the upstream registry
+      credentials, the secret name must start with "ecr-pullthroughcache/"
+    upstream_registry_url: the upstream registry (i.e. ghcr.io)
+    upstream_registry: the upstream registry type (i.e. github-container-registry)
+    repository_prefix: the prefix of the ECR repositories caching the upstream images
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        credential_arn: str,
+        upstream_registry_url: str = GHCR_REGISTRY_URL,
+        upstream_registry: str = GHCR_UPSTREAM_REGISTRY,
+        repository_prefix: str = "ghcr",
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.upstream_registry_url = upstream_registry_url
+        self.repository_prefix = repository_prefix
+
+        ecr.CfnPullThroughCacheRule(
+            self,
+            "PullThroughCacheRule",
+            credential_arn=credential_arn,
+            ecr_repository_prefix=repository_prefix,
+            upstream_registry=upstream_registry,
+            upstream_registry_url=upstream_registry_url,
+        )
+
+    def cached_image(self, location: str):
+        """
+        The cache repository name and tag (or digest) of an upstream image reference
+        (i.e. ghcr.io/sage-bionetworks/openchallenges-app:0.0.11 ->
+        ("ghcr/sage-bionetworks/openchallenges-app", "0.0.11")), None for images
+        of other registries
+        """
+        prefix = f"{self.upstream_registry_url}/"
+        if not location.startswith(prefix):
+            return None
+        repository = location.removeprefix(prefix)
+        separator = "@" if "@" in repository else ":"
+        repository, _, tag = repository.partition(separator)
+        return f"{self.repository_prefix}/{repository}", tag or "latest"
+
+    def grant_pull(self, role: iam.IRole) -> None:
+        """
+        Allow a role to pull images through the cache, the first pull of an image
+        creates its cache repository and imports the image from the upstream registry
+        """
+        stack = cdk.Stack.of(role)
+        role.add_to_principal_policy(
+            iam.PolicyStatement(
+                actions=["ecr:BatchImportUpstreamImage", "ecr:CreateRepository"],
+                resources=[
+                    stack.format_arn(
+                        service="ecr",
+                        resource="repository",
+                        resource_name=f"{self.repository_prefix}/*",
+                    )
+                ],
+                effect=iam.Effect.ALLOW,
+            )
+        )
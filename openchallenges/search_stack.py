@@ -0,0 +1,155 @@
+import os
+
+import aws_cdk as cdk
+
+from aws_cdk import (
+    Duration as duration,
+    aws_ec2 as ec2,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_opensearchservice as opensearch,
+    custom_resources as cr,
+)
+
+from constructs import Construct
+
+INDEX_TEMPLATE_FUNCTION_PATH = os.path.join(
+    os.path.dirname(__file__), "functions", "search_index_template"
+)
+
+# a domain has no dedicated master nodes or an odd number of them to elect a master
+VALID_MASTER_NODES = [0, 3, 5]
+
+
+class SearchStack(cdk.Stack):
+    """
+    Amazon OpenSearch Service domain replacing the single node Elasticsearch container
+
+    vpc: the VPC to run the domain in (private subnets)
+    version: the engine version, Elasticsearch 7.10 is compatible with the Elasticsearch
+      clients of the services
+    data_nodes: the number of data nodes, an even number of data nodes is spread across
+      two availability zones
+    data_node_instance_type: the data node instance type
+    master_nodes: the number of dedicated master nodes (0, 3 or 5)
+    master_node_instance_type: the dedicated master node instance type
+    volume_size: the EBS volume size (GiB) of each data node
+    shards: the number of primary shards of the service indices
+    replicas: the number of replicas of each primary shard, replicas serve search queries
+      and keep the indices available when a data node is replaced
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        vpc: ec2.Vpc,
+        version: opensearch.EngineVersion = opensearch.EngineVersion.ELASTICSEARCH_7_10,
+        data_nodes: int = 2,
+        data_node_instance_type: str = "r6g.large.search",
+        master_nodes: int = 0,
+        master_node_instance_type: str = "m6g.large.search",
+        volume_size: int = 30,
+        shards: int = 2,
+        replicas: int = 1,
+        **kwargs,
+    ) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        if master_nodes not in VALID_MASTER_NODES:
+            raise ValueError(
+                f"{construct_id} dedicated master nodes must be one of {VALID_MASTER_NODES}"
+            )
+        if replicas >= data_nodes:
+            raise ValueError(
+                f"{construct_id} {replicas} replicas can't be allocated on {data_nodes} data nodes"
+            )
+
+        self.security_group = ec2.SecurityGroup(self, "SecurityGroup", vpc=vpc)
+        self.security_group.add_ingress_rule(
+            peer=ec2.Peer.ipv4(vpc.vpc_cidr_block),
+            connection=ec2.Port.tcp(443),
+        )
+
+        # a domain has one subnet per availability zone it is spread across
+        zone_awareness = data_nodes % 2 == 0
+        subnets = vpc.select_subnets(
+            subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+        ).subnets
+        if not zone_awareness:
+            subnets = subnets[:1]
+
+        self.domain = opensearch.Domain(
+            self,
+            "Domain",
+            version=version,
+            vpc=vpc,
+            vpc_subnets=[ec2.SubnetSelection(subnets=subnets)],
+            security_groups=[self.security_group],
+            capacity=opensearch.CapacityConfig(
+                data_nodes=data_nodes,
+                data_node_instance_type=data_node_instance_type,
+                master_nodes=master_nodes or None,
+                master_node_instance_type=(
+                    master_node_instance_type if master_nodes else None
+                ),
+            ),
+            zone_awareness=opensearch.ZoneAwarenessConfig(
+                enabled=zone_awareness,
+                availability_zone_count=2 if zone_awareness else None,
+            ),
+            ebs=opensearch.EbsOptions(
+                volume_size=volume_size,
+                volume_type=ec2.EbsDeviceVolumeType.GP3,
+            ),
+            encryption_at_rest=opensearch.EncryptionAtRestOptions(enabled=True),
+            node_to_node_encryption=True,
+            enforce_https=True,
+            # the service clients don't sign their requests, access is restricted
+            # to the VPC by the domain security group
+            access_policies=[
+                iam.PolicyStatement(
+                    actions=["es:ESHttp*"],
+                    principals=[iam.AnyPrincipal()],
+                    resources=["*"],
+                    effect=iam.Effect.ALLOW,
+                )
+            ],
+            removal_policy=cdk.RemovalPolicy.RETAIN,
+        )
+
+        self.url = f"https://{self.domain.domain_endpoint}:443"
+
+        # environment variables pointing the Spring services to the domain
+        self.env_vars = {"SPRING_ELASTICSEARCH_URIS": self.url}
+
+        # apply the shard and replica settings to the indices created by the services
+        index_template_function = lambda_.Function(
+            self,
+            "IndexTemplateFunction",
+            runtime=lambda_.Runtime.PYTHON_3_11,
+            handler="handler.on_event",
+            code=lambda_.Code.from_asset(INDEX_TEMPLATE_FUNCTION_PATH),
+            timeout=duration.minutes(1),
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS
+            ),
+        )
+        provider = cr.Provider(
+            self, "IndexTemplateProvider", on_event_handler=index_template_function
+        )
+        cdk.CustomResource(
+            self,
+            "IndexTemplate",
+            service_token=provider.service_token,
+            properties={
+                "Endpoint": self.domain.domain_endpoint,
+                "Name": "openchallenges",
+                "IndexPatterns": ["*"],
+                "Shards": shards,
+                "Replicas": replicas,
+            },
+        )
+
+        cdk.CfnOutput(self, "DomainEndpoint", value=self.domain.domain_endpoint)
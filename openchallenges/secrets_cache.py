@@ -0,0 +1,127 @@
+import json
+import os
+import warnings
+
+import keyring
+
+from cryptography.fernet import Fernet, InvalidToken
+from keyring.errors import KeyringError
+
+DEFAULT_CACHE_DIR = os.path.join("~", ".cache", "openchallenges-cdk")
+KEYRING_SERVICE = "openchallenges-cdk"
+KEYRING_USERNAME = "secrets-cache-key"
+
+
+class SecretsCache:
+    """
+    On-disk cache for secrets retrieved from the AWS SSM parameter store.
+
+    Cached values are encrypted with a key generated on first use and stored in the OS
+    keyring (macOS Keychain, Windows Credential Locker, Secret Service), never next to
+    the cache, so reading the cache files doesn't reveal the secrets.  Without a usable
+    keyring nothing is cached.  Entries are keyed by environment and SSM parameter name,
+    each entry keeps the SSM parameter version so stale values can be detected.
+
+    environment: the deployment environment (dev, stage, prod, etc..)
+    ttl: the number of seconds a cached value is valid for
+    verify_versions: whether cached values should be checked against the SSM parameter versions
+    cache_dir: the directory to store the cache in
+    """
+
+    def __init__(
+        self,
+        environment: str,
+        ttl: int,
+        verify_versions: bool = False,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+    ) -> None:
+        self.environment = environment
+        self.ttl = ttl
+        self.verify_versions = verify_versions
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.cache_file = os.path.join(self.cache_dir, f"secrets-{environment}.json")
+
+    def get(self, param_names: list) -> dict:
+        """
+        Get the cached parameters that have not expired.
+
+        Example returned value:
+        {
+            "/openchallenges/MARIADB_PASSWORD": {"Value": "123ABC", "Version": 2}
+        }
+        """
+        entries = self._read()
+        if not entries:
+            return {}
+
+        key = self._key()
+        if key is None:
+            return {}
+        fernet = Fernet(key)
+        parameters = {}
+        for name in param_names:
+            if name not in entries:
+                continue
+            try:
+                value = fernet.decrypt(entries[name]["Token"], ttl=self.ttl)
+            except InvalidToken:  # expired or encrypted with another key
+                continue
+            parameters[name] = {
+                "Value": value.decode(),
+                "Version": entries[name]["Version"],
+            }
+
+        return parameters
+
+    def put(self, parameters: dict) -> None:
+        """
+        Add parameters to the cache, parameters have the same format as
+        the values returned by `get`.
+        """
+        key = self._key()
+        if key is None:
+            return
+        fernet = Fernet(key)
+        entries = self._read()
+        for name, parameter in parameters.items():
+            entries[name] = {
+                "Token": fernet.encrypt(parameter["Value"].encode()).decode(),
+                "Version": parameter["Version"],
+            }
+        self._write(self.cache_file, json.dumps(entries, indent=2).encode())
+
+    def invalidate(self) -> None:
+        """
+        Remove all cached values of the environment
+        """
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.cache_file):
+            return {}
+        with open(self.cache_file) as f:
+            return json.load(f)
+
+    def _key(self) -> bytes:
+        """
+        The cache key from the OS keyring, None when no keyring is available
+        """
+        try:
+            key = keyring.get_password(KEYRING_SERVICE, KEYRING_USERNAME)
+            if key is None:
+                key = Fernet.generate_key().decode()
+                keyring.set_password(KEYRING_SERVICE, KEYRING_USERNAME, key)
+        except KeyringError as error:
+            warnings.warn(f"Secrets are not cached, no OS keyring available: {error}")
+            return None
+        return key.encode()
+
+    def _write(self, path: str, content: bytes) -> None:
+        # write to a temporary file first so readers never see a partial file
+        os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
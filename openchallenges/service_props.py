@@ -1,5 +1,483 @@
+import os
+import re
+import urllib.parse
+
+from aws_cdk import (
+    aws_ec2 as ec2,
+    aws_logs as logs,
+)
+
 CONTAINER_LOCATION_PATH_ID = "path://"
 
+# docker platform of each Fargate CPU architecture
+CPU_ARCHITECTURE_X86_64 = "X86_64"
+CPU_ARCHITECTURE_ARM64 = "ARM64"
+CPU_ARCHITECTURE_PLATFORMS = {
+    CPU_ARCHITECTURE_X86_64: "linux/amd64",
+    CPU_ARCHITECTURE_ARM64: "linux/arm64",
+}
+
+# valid Fargate task memory (MiB) values for each task CPU (units) value
+# https://docs.aws.amazon.com/AmazonECS/latest/developerguide/fargate-tasks-services.html#fargate-tasks-size
+FARGATE_TASK_SIZES = {
+    256: [512, 1024, 2048],
+    512: list(range(1024, 4096 + 1, 1024)),
+    1024: list(range(2048, 8192 + 1, 1024)),
+    2048: list(range(4096, 16384 + 1, 1024)),
+    4096: list(range(8192, 30720 + 1, 1024)),
+    8192: list(range(16384, 61440 + 1, 4096)),
+    16384: list(range(32768, 122880 + 1, 8192)),
+}
+
+
+# JVM garbage collectors (-XX:+Use<name>GC)
+JVM_GARBAGE_COLLECTORS = ["G1", "Parallel", "Serial", "Z"]
+
+# memory (MiB) used by the JVM outside of the heap and metaspace (thread stacks, code cache, GC)
+JVM_MIN_NON_HEAP_MEMORY = 256
+
+# health check timeout (seconds) of the load balancer target groups (ip targets)
+ALB_DEFAULT_HEALTH_CHECK_TIMEOUT = 5
+
+# readiness probes of the wait for endpoints (see service_stack.WAIT_FOR_SCRIPT)
+WAIT_FOR_SCHEMES = ["http", "tcp"]
+
+
+class AutoScalingProps:
+    """
+    ECS service auto scaling properties
+
+    min_capacity: the minimum number of running tasks
+    max_capacity: the maximum number of running tasks
+    cpu_target_utilization: the target average CPU utilization (percent) of the service,
+      None to disable CPU based scaling
+    memory_target_utilization: the target average memory utilization (percent) of the service,
+      None to disable memory based scaling
+    requests_per_target: the target number of ALB requests per task, only applies to services
+      fronted by a load balancer (LoadBalancedServiceStack), None to disable request based scaling
+    scale_in_cooldown: seconds to wait after a scale in activity before scaling in again
+    scale_out_cooldown: seconds to wait after a scale out activity before scaling out again
+    """
+
+    def __init__(
+        self,
+        min_capacity: int = 1,
+        max_capacity: int = 1,
+        cpu_target_utilization: int = None,
+        memory_target_utilization: int = None,
+        requests_per_target: int = None,
+        scale_in_cooldown: int = 300,
+        scale_out_cooldown: int = 60,
+    ) -> None:
+        if min_capacity < 1 or max_capacity < min_capacity:
+            raise ValueError(
+                f"Invalid task capacity range min={min_capacity}, max={max_capacity}"
+            )
+        self.min_capacity = min_capacity
+        self.max_capacity = max_capacity
+        self.cpu_target_utilization = cpu_target_utilization
+        self.memory_target_utilization = memory_target_utilization
+        self.requests_per_target = requests_per_target
+        self.scale_in_cooldown = scale_in_cooldown
+        self.scale_out_cooldown = scale_out_cooldown
+
+
+class VolumeProps:
+    """
+    ECS service managed EBS volume properties
+
+    container_path: the container path to mount the volume at
+    size: the volume size (GiB)
+    volume_type: the EBS volume type (i.e. ec2.EbsDeviceVolumeType.GP3)
+    iops: the provisioned IOPS (gp3, io1 and io2 only), None for the volume type default
+    throughput: the provisioned throughput (MiB/s, gp3 only), None for the volume type default
+    snapshot_id: the EBS snapshot to create the volume from, None to start with an empty volume
+    """
+
+    def __init__(
+        self,
+        container_path: str,
+        size: int = 30,
+        volume_type: ec2.EbsDeviceVolumeType = ec2.EbsDeviceVolumeType.GP3,
+        iops: int = None,
+        throughput: int = None,
+        snapshot_id: str = None,
+    ) -> None:
+        provisioned_iops_types = [
+            ec2.EbsDeviceVolumeType.GP3,
+            ec2.EbsDeviceVolumeType.IO1,
+            ec2.EbsDeviceVolumeType.IO2,
+        ]
+        if iops is not None and volume_type not in provisioned_iops_types:
+            raise ValueError(f"Volume type {volume_type} does not support IOPS")
+        if throughput is not None and volume_type != ec2.EbsDeviceVolumeType.GP3:
+            raise ValueError(f"Volume type {volume_type} does not support throughput")
+        self.container_path = container_path
+        self.size = size
+        self.volume_type = volume_type
+        self.iops = iops
+        self.throughput = throughput
+        self.snapshot_id = snapshot_id
+
+
+class CapacityProps:
+    """
+    ECS service capacity provider strategy, splits the service tasks between on-demand
+    Fargate and Fargate Spot
+
+    on_demand_base: the number of tasks always run on on-demand Fargate
+    on_demand_weight: the relative share of the tasks above the base run on on-demand Fargate
+    spot_weight: the relative share of the tasks above the base run on Fargate Spot
+      (i.e. on_demand_weight=1, spot_weight=3 runs 3 out of 4 tasks on Spot)
+    """
+
+    def __init__(
+        self,
+        on_demand_base: int = 0,
+        on_demand_weight: int = 1,
+        spot_weight: int = 0,
+    ) -> None:
+        if on_demand_base < 0 or on_demand_weight < 0 or spot_weight < 0:
+            raise ValueError("Capacity provider base and weights must not be negative")
+        if on_demand_weight + spot_weight == 0:
+            raise ValueError("At least one capacity provider weight must be positive")
+        self.on_demand_base = on_demand_base
+        self.on_demand_weight = on_demand_weight
+        self.spot_weight = spot_weight
+
+
+class JvmProps:
+    """
+    JVM settings of a Java container, rendered into JAVA_TOOL_OPTIONS
+
+    heap_percentage: the heap size as a percentage of the container memory, the initial heap
+      is the maximum heap so it is not resized under load
+    gc: the garbage collector, one of G1, Parallel, Serial or Z
+    max_metaspace_size: the maximum metaspace size (MiB), None for unlimited
+    class_data_sharing: share the class metadata between JVM starts (CDS) to start faster
+    cds_archive: the AppCDS archive of the application classes (i.e. /workspace/app.jsa),
+      None to only share the JDK classes, requires class_data_sharing
+    """
+
+    def __init__(
+        self,
+        heap_percentage: int = 75,
+        gc: str = "G1",
+        max_metaspace_size: int = None,
+        class_data_sharing: bool = True,
+        cds_archive: str = None,
+    ) -> None:
+        if not 10 <= heap_percentage <= 90:
+            raise ValueError(
+                f"JVM heap percentage {heap_percentage} must be between 10 and 90"
+            )
+        if gc not in JVM_GARBAGE_COLLECTORS:
+            raise ValueError(
+                f"Invalid JVM garbage collector {gc}, must be one of {', '.join(JVM_GARBAGE_COLLECTORS)}"
+            )
+        if cds_archive and not class_data_sharing:
+            raise ValueError("A CDS archive requires class data sharing")
+        self.heap_percentage = heap_percentage
+        self.gc = gc
+        self.max_metaspace_size = max_metaspace_size
+        self.class_data_sharing = class_data_sharing
+        self.cds_archive = cds_archive
+
+    def heap_size(self, container_memory: int) -> int:
+        """
+        The heap size (MiB) in a container with the given memory (MiB)
+        """
+        return container_memory * self.heap_percentage // 100
+
+    def java_tool_options(self) -> str:
+        options = [
+            f"-XX:InitialRAMPercentage={self.heap_percentage}.0",
+            f"-XX:MaxRAMPercentage={self.heap_percentage}.0",
+            f"-XX:+Use{self.gc}GC",
+        ]
+        if self.max_metaspace_size is not None:
+            options.append(f"-XX:MaxMetaspaceSize={self.max_metaspace_size}m")
+        options.append("-Xshare:auto" if self.class_data_sharing else "-Xshare:off")
+        if self.cds_archive:
+            options.append(f"-XX:SharedArchiveFile={self.cds_archive}")
+        return " ".join(options)
+
+
+class LoggingProps:
+    """
+    ECS service container logging properties
+
+    non_blocking: buffer the container logs in memory instead of blocking the container writes
+      when CloudWatch Logs is slow or throttles, logs are dropped when the buffer is full
+    max_buffer_size: the size (MiB) of the non blocking log buffer
+    retention: the CloudWatch Logs retention (i.e. logs.RetentionDays.FOUR_MONTHS)
+    firelens: route the container logs through a Fluent Bit (FireLens) sidecar, which batches
+      them before sending them to CloudWatch Logs or S3
+    firelens_bucket_name: the S3 bucket the Fluent Bit sidecar uploads gzip compressed logs to,
+      None to send them to CloudWatch Logs
+    """
+
+    def __init__(
+        self,
+        non_blocking: bool = True,
+        max_buffer_size: int = 25,
+        retention: logs.RetentionDays = logs.RetentionDays.FOUR_MONTHS,
+        firelens: bool = False,
+        firelens_bucket_name: str = None,
+    ) -> None:
+        if max_buffer_size <= 0:
+            raise ValueError(f"Log buffer size {max_buffer_size} MiB must be positive")
+        if firelens_bucket_name and not firelens:
+            raise ValueError("Logging to an S3 bucket requires FireLens")
+        self.non_blocking = non_blocking
+        self.max_buffer_size = max_buffer_size
+        self.retention = retention
+        self.firelens = firelens
+        self.firelens_bucket_name = firelens_bucket_name
+
+
+class AlarmProps:
+    """
+    ECS service alarm thresholds, None disables an alarm
+
+    cpu_utilization: the average CPU utilization (percent) of the service
+    memory_utilization: the average memory utilization (percent) of the service
+    response_time_p99: the p99 response time (seconds) of the service, measured by Service Connect
+      and, for services fronted by a load balancer, by the load balancer
+    http_5xx_count: the number of 5xx responses of the service per period
+    period: the alarm evaluation period (seconds)
+    evaluation_periods: the number of consecutive periods breaching a threshold to raise an alarm
+    """
+
+    def __init__(
+        self,
+        cpu_utilization: int = 90,
+        memory_utilization: int = 90,
+        response_time_p99: float = None,
+        http_5xx_count: int = None,
+        period: int = 60,
+        evaluation_periods: int = 5,
+    ) -> None:
+        self.cpu_utilization = cpu_utilization
+        self.memory_utilization = memory_utilization
+        self.response_time_p99 = response_time_p99
+        self.http_5xx_count = http_5xx_count
+        self.period = period
+        self.evaluation_periods = evaluation_periods
+
+
+class DeploymentProps:
+    """
+    ECS service deployment properties
+
+    min_healthy_percent: the percentage of the desired tasks kept running during a deployment
+    max_healthy_percent: the percentage of the desired tasks that can run during a deployment,
+      new tasks are started before the old ones are stopped when above 100
+    circuit_breaker: stop a deployment whose tasks fail to start and roll back to the last
+      completed deployment
+    health_check_command: the container health check command (i.e. ["CMD-SHELL", "curl -f
+      http://localhost:8080/health || exit 1"]), None for no container health check
+    health_check_interval: seconds between container health checks (5-300)
+    health_check_timeout: seconds to wait for a container health check to succeed (2-60)
+    health_check_retries: consecutive failed container health checks to consider the container
+      unhealthy (1-10)
+    health_check_start_period: seconds the container health check failures are ignored after
+      the container starts (0-300), i.e. while the JVM warms up
+    health_check_grace_period: seconds the service ignores failed load balancer and container
+      health checks of a new task, None for the ECS default
+    """
+
+    def __init__(
+        self,
+        min_healthy_percent: int = 100,
+        max_healthy_percent: int = 200,
+        circuit_breaker: bool = True,
+        health_check_command: list = None,
+        health_check_interval: int = 30,
+        health_check_timeout: int = 5,
+        health_check_retries: int = 3,
+        health_check_start_period: int = 0,
+        health_check_grace_period: int = None,
+    ) -> None:
+        if not 0 <= min_healthy_percent <= 100:
+            raise ValueError(
+                f"Minimum healthy percent {min_healthy_percent} must be between 0 and 100"
+            )
+        if not 100 <= max_healthy_percent <= 200:
+            raise ValueError(
+                f"Maximum healthy percent {max_healthy_percent} must be between 100 and 200"
+            )
+        if min_healthy_percent == 100 and max_healthy_percent == 100:
+            raise ValueError(
+                "A deployment can't stop or start tasks with 100% minimum and maximum healthy percent"
+            )
+        if not 5 <= health_check_interval <= 300:
+            raise ValueError(
+                f"Health check interval {health_check_interval} must be between 5 and 300 seconds"
+            )
+        if not 2 <= health_check_timeout <= 60:
+            raise ValueError(
+                f"Health check timeout {health_check_timeout} must be between 2 and 60 seconds"
+            )
+        if not 1 <= health_check_retries <= 10:
+            raise ValueError(
+                f"Health check retries {health_check_retries} must be between 1 and 10"
+            )
+        if not 0 <= health_check_start_period <= 300:
+            raise ValueError(
+                f"Health check start period {health_check_start_period} must be between 0 and 300 seconds"
+            )
+        self.min_healthy_percent = min_healthy_percent
+        self.max_healthy_percent = max_healthy_percent
+        self.circuit_breaker = circuit_breaker
+        self.health_check_command = health_check_command
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.health_check_retries = health_check_retries
+        self.health_check_start_period = health_check_start_period
+        self.health_check_grace_period = health_check_grace_period
+
+
+class LoadBalancingProps:
+    """
+    Load balancer target group properties of a service fronted by a load balancer
+
+    health_check_path: the path of the health check requests
+    health_check_interval: seconds between health checks of a task (5-300), greater than
+      the health check timeout
+    health_check_timeout: seconds to wait for a health check response, None for the
+      load balancer default (5), which requires an interval above 5 seconds
+    healthy_threshold: consecutive successful health checks to consider a task healthy (2-10)
+    unhealthy_threshold: consecutive failed health checks to consider a task unhealthy (2-10)
+    slow_start: seconds to linearly ramp up the traffic sent to a new task (30-900), 0 to send
+      it its full share of traffic at once
+    deregistration_delay: seconds to let a stopping task finish its in-flight requests (0-3600)
+    least_outstanding_requests: route requests to the task with the fewest in-flight requests
+      instead of round robin, can't be combined with slow start
+    """
+
+    def __init__(
+        self,
+        health_check_path: str = "/",
+        health_check_interval: int = 30,
+        health_check_timeout: int = None,
+        healthy_threshold: int = 5,
+        unhealthy_threshold: int = 2,
+        slow_start: int = 0,
+        deregistration_delay: int = 300,
+        least_outstanding_requests: bool = False,
+    ) -> None:
+        if not 5 <= health_check_interval <= 300:
+            raise ValueError(
+                f"Health check interval {health_check_interval} must be between 5 and 300 seconds"
+            )
+        if (
+            health_check_timeout is None
+            and health_check_interval <= ALB_DEFAULT_HEALTH_CHECK_TIMEOUT
+        ):
+            raise ValueError(
+                f"Health check interval {health_check_interval} must be greater than the "
+                f"default health check timeout {ALB_DEFAULT_HEALTH_CHECK_TIMEOUT}, "
+                "set a shorter health check timeout"
+            )
+        if health_check_timeout is not None and not (
+            2 <= health_check_timeout < health_check_interval
+        ):
+            raise ValueError(
+                f"Health check timeout {health_check_timeout} must be between 2 seconds "
+                f"and the health check interval"
+            )
+        for threshold in [healthy_threshold, unhealthy_threshold]:
+            if not 2 <= threshold <= 10:
+                raise ValueError(
+                    f"Health check threshold {threshold} must be between 2 and 10"
+                )
+        if slow_start and not 30 <= slow_start <= 900:
+            raise ValueError(
+                f"Slow start {slow_start} must be 0 or between 30 and 900 seconds"
+            )
+        if not 0 <= deregistration_delay <= 3600:
+            raise ValueError(
+                f"Deregistration delay {deregistration_delay} must be between 0 and 3600 seconds"
+            )
+        if slow_start and least_outstanding_requests:
+            raise ValueError(
+                "Slow start is not supported with least outstanding requests routing"
+            )
+        self.health_check_path = health_check_path
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.healthy_threshold = healthy_threshold
+        self.unhealthy_threshold = unhealthy_threshold
+        self.slow_start = slow_start
+        self.deregistration_delay = deregistration_delay
+        self.least_outstanding_requests = least_outstanding_requests
+
+
+def check_dockerfile_platform(
+    container_name: str, dockerfile: str, platform: str
+) -> None:
+    """
+    Raise a ValueError when the final stage of the Dockerfile is pinned (FROM --platform=...)
+    to another platform than the task platform (i.e. linux/arm64).  Build arguments such as
+    $TARGETPLATFORM resolve to the platform the image is built for and are accepted.
+    """
+    if not os.path.exists(dockerfile):
+        return
+    with open(dockerfile) as f:
+        stages = re.findall(r"^\s*FROM\s+(.*)$", f.read(), re.IGNORECASE | re.MULTILINE)
+    if not stages:
+        return
+    pinned = re.search(r"--platform=(\S+)", stages[-1])
+    if (
+        pinned
+        and "$" not in pinned.group(1)
+        and not pinned.group(1).startswith(platform)
+    ):
+        raise ValueError(
+            f"{container_name} is built for {pinned.group(1)} ({dockerfile}) "
+            f"but the task runs on {platform}"
+        )
+
+
+def check_wait_for_endpoint(container_name: str, endpoint: str) -> None:
+    """
+    Check that a wait for endpoint is an http://host:port/path or tcp://host:port URL
+    """
+    url = urllib.parse.urlsplit(endpoint)
+    try:
+        port = url.port
+    except ValueError:
+        port = None
+    if (
+        url.scheme not in WAIT_FOR_SCHEMES
+        or not url.hostname
+        or port is None
+        or (url.scheme == "tcp" and url.path not in ["", "/"])
+    ):
+        raise ValueError(
+            f"{container_name} waits for an invalid endpoint {endpoint}, "
+            "must be http://host:port/path or tcp://host:port"
+        )
+
+
+def check_jvm_memory(container_name: str, container_memory: int, jvm: JvmProps) -> None:
+    """
+    Raise a ValueError when the JVM heap, metaspace and minimum non heap memory don't fit
+    in the container memory, the container would be killed when the JVM memory grows
+    """
+    jvm_memory = (
+        jvm.heap_size(container_memory)
+        + (jvm.max_metaspace_size or 0)
+        + JVM_MIN_NON_HEAP_MEMORY
+    )
+    if jvm_memory > container_memory:
+        raise ValueError(
+            f"{container_name} JVM needs {jvm_memory} MiB (heap {jvm.heap_size(container_memory)} MiB, "
+            f"metaspace {jvm.max_metaspace_size or 0} MiB, non heap {JVM_MIN_NON_HEAP_MEMORY} MiB) "
+            f"but the container memory is {container_memory} MiB"
+        )
+
 
 class ServiceProps:
     """
@@ -13,6 +491,30 @@ class ServiceProps:
       supports docker registry references (i.e. ghcr.io/sage-bionetworks/openchallenges-thumbor:latest)
     container_env_vars: a json dictionary of environment variables to pass into the container
       i.e. {"EnvA": "EnvValueA", "EnvB": "EnvValueB"}
+    task_cpu: the task CPU units (i.e. 1024 for 1 vCPU), must be a valid Fargate task size
+    task_memory: the task memory (MiB), must be a valid Fargate memory value for task_cpu
+    volume: the service managed EBS volume properties (VolumeProps), services with a volume
+      run a single task, None for no volume
+    shared_volume_path: the container path to mount a shared (EFS) volume at, the volume
+      persists across task restarts and is shared by all tasks of the service, None for no shared volume
+    auto_scaling: the service auto scaling properties (AutoScalingProps), None to run a single task
+    cpu_architecture: the CPU architecture of the task, X86_64 or ARM64 (Graviton), the container
+      image must support it, "path://" containers are built for it
+    capacity: the service capacity provider strategy (CapacityProps), None to run all tasks
+      on on-demand Fargate
+    soci_index: lazy load the container image with a Seekable OCI (SOCI) index, so tasks start
+      before the whole image is pulled, a SOCI index is generated and pushed with "path://"
+      containers, registry images must be pushed to ECR with their index
+    jvm: the JVM settings (JvmProps) of Java containers, rendered into JAVA_TOOL_OPTIONS,
+      None to leave the JVM settings to the container
+    alarms: the service alarm thresholds (AlarmProps), None for the default thresholds
+    logging: the container logging properties (LoggingProps), None for the defaults
+    deployment: the service deployment properties (DeploymentProps), None for the defaults
+    wait_for: the endpoints that must be ready before the container starts, checked by an
+      init container: http://host:port/path must answer with a 2xx status
+      (i.e. http://openchallenges-config-server:8090/actuator/health) and tcp://host:port
+      must send data on connect (i.e. the MySQL handshake of tcp://openchallenges-mariadb:3306)
+    wait_for_timeout: seconds to wait for the endpoints before the task fails
     """
 
     def __init__(
@@ -22,13 +524,72 @@ class ServiceProps:
         container_memory: int,
         container_location: str,
         container_env_vars: dict,
+        task_cpu: int = 1024,
+        task_memory: int = 4096,
+        volume: VolumeProps = None,
+        shared_volume_path: str = None,
+        auto_scaling: AutoScalingProps = None,
+        cpu_architecture: str = CPU_ARCHITECTURE_X86_64,
+        capacity: CapacityProps = None,
+        soci_index: bool = False,
+        jvm: JvmProps = None,
+        alarms: AlarmProps = None,
+        logging: LoggingProps = None,
+        deployment: DeploymentProps = None,
+        wait_for: list = None,
+        wait_for_timeout: int = 600,
     ) -> None:
+        if task_memory not in FARGATE_TASK_SIZES.get(task_cpu, []):
+            raise ValueError(
+                f"{container_name} has an invalid Fargate task size cpu={task_cpu}, memory={task_memory}"
+            )
+        if container_memory > task_memory:
+            raise ValueError(
+                f"{container_name} container memory {container_memory} MiB exceeds task memory {task_memory} MiB"
+            )
+        if jvm is not None:
+            check_jvm_memory(container_name, container_memory, jvm)
+            if "JAVA_TOOL_OPTIONS" in container_env_vars:
+                raise ValueError(
+                    f"{container_name} sets both JAVA_TOOL_OPTIONS and JVM properties"
+                )
+        for endpoint in wait_for or []:
+            check_wait_for_endpoint(container_name, endpoint)
+        if wait_for_timeout <= 0:
+            raise ValueError(
+                f"{container_name} wait for timeout {wait_for_timeout} must be positive"
+            )
+        if cpu_architecture not in CPU_ARCHITECTURE_PLATFORMS:
+            raise ValueError(
+                f"{container_name} has an invalid CPU architecture {cpu_architecture}, "
+                f"must be one of {', '.join(CPU_ARCHITECTURE_PLATFORMS)}"
+            )
         self.container_name = container_name
         self.container_port = container_port
         self.container_memory = container_memory
-        if CONTAINER_LOCATION_PATH_ID in container_location:
+        self.container_from_path = CONTAINER_LOCATION_PATH_ID in container_location
+        if self.container_from_path:
             container_location = container_location.removeprefix(
                 CONTAINER_LOCATION_PATH_ID
             )
+            check_dockerfile_platform(
+                container_name,
+                os.path.join(container_location, "Dockerfile"),
+                CPU_ARCHITECTURE_PLATFORMS[cpu_architecture],
+            )
         self.container_location = container_location
         self.container_env_vars = container_env_vars
+        self.task_cpu = task_cpu
+        self.task_memory = task_memory
+        self.volume = volume
+        self.shared_volume_path = shared_volume_path
+        self.auto_scaling = auto_scaling
+        self.cpu_architecture = cpu_architecture
+        self.capacity = capacity
+        self.soci_index = soci_index
+        self.jvm = jvm
+        self.alarms = alarms or AlarmProps()
+        self.logging = logging or LoggingProps()
+        self.deployment = deployment or DeploymentProps()
+        self.wait_for = wait_for or []
+        self.wait_for_timeout = wait_for_timeout
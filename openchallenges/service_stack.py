@@ -4,15 +4,62 @@ from aws_cdk import (
     Duration as duration,
     aws_ecs as ecs,
     aws_ec2 as ec2,
+    aws_efs as efs,
     aws_logs as logs,
     Size as size,
     aws_elasticloadbalancingv2 as elbv2,
     aws_certificatemanager as acm,
     aws_iam as iam,
+    aws_ecr as ecr,
+    aws_ecr_assets as ecr_assets,
 )
 
 from constructs import Construct
-from openchallenges.service_props import ServiceProps
+from openchallenges.registry_cache_stack import RegistryCacheStack
+from openchallenges.service_props import (
+    ServiceProps,
+    DeploymentProps,
+    LoadBalancingProps,
+    LoggingProps,
+    CPU_ARCHITECTURE_PLATFORMS,
+)
+from openchallenges.soci_index import SociIndexBuild
+
+WAIT_FOR_IMAGE = "public.ecr.aws/docker/library/busybox:stable"
+
+# wait until every endpoint of $WAIT_FOR is ready or $WAIT_FOR_TIMEOUT seconds elapsed.
+# Service Connect names resolve to the task Envoy proxy, which accepts TCP connections
+# whether or not an upstream task is healthy, so endpoints are probed at the protocol
+# level: an http:// endpoint must answer with a 2xx status (Envoy answers 503 without a
+# healthy upstream) and a tcp:// endpoint must send data on connect, like the MySQL
+# handshake (Envoy closes the connection without sending anything).
+WAIT_FOR_SCRIPT = """
+set -f
+ready() {
+  case "$1" in
+    http://*)
+      wget -q -T 2 -O /dev/null "$1"
+      ;;
+    tcp://*)
+      address="${1#tcp://}"
+      [ "$(sleep 1 | timeout 3 nc "${address%:*}" "${address##*:}" 2>/dev/null | wc -c)" -gt 0 ]
+      ;;
+  esac
+}
+deadline=$(( $(date +%s) + WAIT_FOR_TIMEOUT ))
+for endpoint in $WAIT_FOR; do
+  until ready "$endpoint"; do
+    if [ "$(date +%s)" -ge "$deadline" ]; then
+      echo "timed out waiting for $endpoint"
+      exit 1
+    fi
+    sleep 2
+  done
+  echo "$endpoint is ready"
+done
+"""
+
+FLUENT_BIT_IMAGE = "public.ecr.aws/aws-observability/aws-for-fluent-bit:stable"
 
 ALB_HTTP_LISTENER_PORT = 80
 ALB_HTTPS_LISTENER_PORT = 443
@@ -21,6 +68,9 @@ ALB_HTTPS_LISTENER_PORT = 443
 class ServiceStack(cdk.Stack):
     """
     ECS Service stack
+
+    registry_cache: pull the container image through this ECR pull through cache when
+      it is hosted on the cache upstream registry, None to pull from the registry
     """
 
     def __init__(
@@ -30,10 +80,15 @@ class ServiceStack(cdk.Stack):
         vpc: ec2.Vpc,
         cluster: ecs.Cluster,
         props: ServiceProps,
+        registry_cache: RegistryCacheStack = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        self.props = props
+        self.cluster = cluster
+        self.target_group = None
+
         # allow containers default task access and s3 bucket access
         task_role = iam.Role(
             self,
@@ -64,21 +119,26 @@ class ServiceStack(cdk.Stack):
         self.task_definition = ecs.FargateTaskDefinition(
             self,
             "TaskDef",
-            cpu=1024,
-            memory_limit_mib=4096,
+            cpu=props.task_cpu,
+            memory_limit_mib=props.task_memory,
             task_role=task_role,
+            runtime_platform=ecs.RuntimePlatform(
+                cpu_architecture=getattr(ecs.CpuArchitecture, props.cpu_architecture),
+                operating_system_family=ecs.OperatingSystemFamily.LINUX,
+            ),
         )
 
-        image = ecs.ContainerImage.from_registry(props.container_location)
-        if "path://" in props.container_location:  # build container from source
-            location = props.container_location.removeprefix("path://")
-            image = ecs.ContainerImage.from_asset(location)
+        image = self._container_image(props, registry_cache)
+
+        environment = dict(props.container_env_vars)
+        if props.jvm is not None:
+            environment["JAVA_TOOL_OPTIONS"] = props.jvm.java_tool_options()
 
         self.container = self.task_definition.add_container(
             props.container_name,
             image=image,
             memory_limit_mib=props.container_memory,
-            environment=props.container_env_vars,
+            environment=environment,
             port_mappings=[
                 ecs.PortMapping(
                     name=props.container_name,
@@ -86,28 +146,81 @@ class ServiceStack(cdk.Stack):
                     protocol=ecs.Protocol.TCP,
                 )
             ],
-            logging=ecs.LogDrivers.aws_logs(
-                stream_prefix=f"{construct_id}",
-                log_retention=logs.RetentionDays.FOUR_MONTHS,
-            ),
+            logging=self._log_driver(props, construct_id),
+            health_check=self._container_health_check(props.deployment),
         )
 
+        # start the container once the endpoints it depends on are ready
+        self.wait_for_container = None
+        if props.wait_for:
+            self.wait_for_container = self.task_definition.add_container(
+                "wait-for",
+                image=ecs.ContainerImage.from_registry(WAIT_FOR_IMAGE),
+                essential=False,
+                memory_reservation_mib=16,
+                entry_point=["sh", "-c"],
+                command=[WAIT_FOR_SCRIPT],
+                environment={
+                    "WAIT_FOR": " ".join(props.wait_for),
+                    "WAIT_FOR_TIMEOUT": str(props.wait_for_timeout),
+                },
+                logging=self._aws_log_driver(props.logging, f"{construct_id}-wait-for"),
+            )
+            self.container.add_container_dependencies(
+                ecs.ContainerDependency(
+                    container=self.wait_for_container,
+                    condition=ecs.ContainerDependencyCondition.SUCCESS,
+                )
+            )
+
         self.security_group = ec2.SecurityGroup(self, "SecurityGroup", vpc=vpc)
         self.security_group.add_ingress_rule(
             peer=ec2.Peer.ipv4("0.0.0.0/0"),
             connection=ec2.Port.tcp(props.container_port),
         )
 
+        # run tasks on on-demand and spot Fargate capacity
+        capacity_provider_strategies = None
+        if props.capacity is not None:
+            if props.volume is not None and props.capacity.spot_weight > 0:
+                raise ValueError(
+                    f"{props.container_name} mounts a service volume and must not run on Fargate Spot"
+                )
+            capacity_provider_strategies = [
+                ecs.CapacityProviderStrategy(
+                    capacity_provider="FARGATE",
+                    base=props.capacity.on_demand_base,
+                    weight=props.capacity.on_demand_weight,
+                ),
+                ecs.CapacityProviderStrategy(
+                    capacity_provider="FARGATE_SPOT",
+                    weight=props.capacity.spot_weight,
+                ),
+            ]
+
         # attach ECS task to ECS cluster
         self.service = ecs.FargateService(
             self,
             "Service",
             cluster=cluster,
             task_definition=self.task_definition,
+            capacity_provider_strategies=capacity_provider_strategies,
+            min_healthy_percent=props.deployment.min_healthy_percent,
+            max_healthy_percent=props.deployment.max_healthy_percent,
+            circuit_breaker=(
+                ecs.DeploymentCircuitBreaker(rollback=True)
+                if props.deployment.circuit_breaker
+                else None
+            ),
+            health_check_grace_period=(
+                duration.seconds(props.deployment.health_check_grace_period)
+                if props.deployment.health_check_grace_period is not None
+                else None
+            ),
             enable_execute_command=True,
             security_groups=([self.security_group]),
             service_connect_configuration=ecs.ServiceConnectProps(
-                log_driver=ecs.LogDrivers.aws_logs(stream_prefix=f"{construct_id}"),
+                log_driver=self._aws_log_driver(props.logging, construct_id),
                 services=[
                     ecs.ServiceConnectService(
                         port_mapping_name=props.container_name,
@@ -118,15 +231,19 @@ class ServiceStack(cdk.Stack):
             ),
         )
 
-        # mount volume for DB
-        if "mariadb" in construct_id:
+        # mount a service managed EBS volume
+        self.volume = None
+        if props.volume is not None:
             self.volume = ecs.ServiceManagedVolume(
                 self,
                 "ServiceVolume",
                 name=props.container_name,
                 managed_ebs_volume=ecs.ServiceManagedEBSVolumeConfiguration(
-                    size=size.gibibytes(30),
-                    volume_type=ec2.EbsDeviceVolumeType.GP3,
+                    size=size.gibibytes(props.volume.size),
+                    volume_type=props.volume.volume_type,
+                    iops=props.volume.iops,
+                    throughput=props.volume.throughput,
+                    snap_shot_id=props.volume.snapshot_id,
                 ),
             )
 
@@ -136,12 +253,181 @@ class ServiceStack(cdk.Stack):
             self.service.add_volume(self.volume)
 
             self.volume.mount_in(
-                # should be mounted at openchallenges-mariadb:/data/db
                 self.container,
-                container_path="/data/db",
+                container_path=props.volume.container_path,
                 read_only=False,
             )
 
+        # mount a volume shared by all tasks of the service
+        self.file_system = None
+        if props.shared_volume_path is not None:
+            self.file_system = efs.FileSystem(
+                self,
+                "SharedFileSystem",
+                vpc=vpc,
+                encrypted=True,
+                performance_mode=efs.PerformanceMode.GENERAL_PURPOSE,
+                throughput_mode=efs.ThroughputMode.ELASTIC,
+            )
+            self.file_system.connections.allow_default_port_from(self.security_group)
+            # containers may run as root, allow them to write without root squashing
+            self.file_system.grant_root_access(task_role)
+
+            shared_volume_name = f"{props.container_name}-shared"
+            self.task_definition.add_volume(
+                name=shared_volume_name,
+                efs_volume_configuration=ecs.EfsVolumeConfiguration(
+                    file_system_id=self.file_system.file_system_id,
+                    transit_encryption="ENABLED",
+                    authorization_config=ecs.AuthorizationConfig(iam="ENABLED"),
+                ),
+            )
+            self.container.add_mount_points(
+                ecs.MountPoint(
+                    container_path=props.shared_volume_path,
+                    source_volume=shared_volume_name,
+                    read_only=False,
+                )
+            )
+
+        # auto scale the number of tasks
+        self.scalable_target = None
+        if props.auto_scaling is not None:
+            if self.volume is not None:
+                raise ValueError(
+                    f"{props.container_name} mounts a service volume and must run as a single task"
+                )
+            scaling = props.auto_scaling
+            self.scalable_target = self.service.auto_scale_task_count(
+                min_capacity=scaling.min_capacity,
+                max_capacity=scaling.max_capacity,
+            )
+            if scaling.cpu_target_utilization is not None:
+                self.scalable_target.scale_on_cpu_utilization(
+                    "CpuScaling",
+                    target_utilization_percent=scaling.cpu_target_utilization,
+                    scale_in_cooldown=duration.seconds(scaling.scale_in_cooldown),
+                    scale_out_cooldown=duration.seconds(scaling.scale_out_cooldown),
+                )
+            if scaling.memory_target_utilization is not None:
+                self.scalable_target.scale_on_memory_utilization(
+                    "MemoryScaling",
+                    target_utilization_percent=scaling.memory_target_utilization,
+                    scale_in_cooldown=duration.seconds(scaling.scale_in_cooldown),
+                    scale_out_cooldown=duration.seconds(scaling.scale_out_cooldown),
+                )
+
+    def _container_health_check(self, deployment: DeploymentProps) -> ecs.HealthCheck:
+        if deployment.health_check_command is None:
+            return None
+        return ecs.HealthCheck(
+            command=deployment.health_check_command,
+            interval=duration.seconds(deployment.health_check_interval),
+            timeout=duration.seconds(deployment.health_check_timeout),
+            retries=deployment.health_check_retries,
+            start_period=duration.seconds(deployment.health_check_start_period),
+        )
+
+    def _aws_log_driver(
+        self, logging: LoggingProps, stream_prefix: str
+    ) -> ecs.LogDriver:
+        return ecs.LogDrivers.aws_logs(
+            stream_prefix=stream_prefix,
+            log_retention=logging.retention,
+            mode=(
+                ecs.AwsLogDriverMode.NON_BLOCKING
+                if logging.non_blocking
+                else ecs.AwsLogDriverMode.BLOCKING
+            ),
+            max_buffer_size=(
+                size.mebibytes(logging.max_buffer_size)
+                if logging.non_blocking
+                else None
+            ),
+        )
+
+    def _log_driver(self, props: ServiceProps, construct_id: str) -> ecs.LogDriver:
+        """
+        The container log driver, either awslogs or a Fluent Bit (FireLens) sidecar
+        batching the logs to CloudWatch Logs or S3
+        """
+        logging = props.logging
+        if not logging.firelens:
+            return self._aws_log_driver(logging, construct_id)
+
+        self.task_definition.add_firelens_log_router(
+            "LogRouter",
+            image=ecs.ContainerImage.from_registry(FLUENT_BIT_IMAGE),
+            firelens_config=ecs.FirelensConfig(
+                type=ecs.FirelensLogRouterType.FLUENTBIT
+            ),
+            memory_reservation_mib=50,
+            logging=self._aws_log_driver(logging, f"{construct_id}-firelens"),
+        )
+        if logging.firelens_bucket_name:
+            options = {
+                "Name": "s3",
+                "region": self.region,
+                "bucket": logging.firelens_bucket_name,
+                "s3_key_format": f"/{props.container_name}/%Y/%m/%d/%H/$UUID.gz",
+                "total_file_size": "10M",
+                "upload_timeout": "1m",
+                "compression": "gzip",
+                "use_put_object": "On",
+            }
+        else:
+            log_group = logs.LogGroup(
+                self, "FirelensLogGroup", retention=logging.retention
+            )
+            options = {
+                "Name": "cloudwatch_logs",
+                "region": self.region,
+                "log_group_name": log_group.log_group_name,
+                "log_stream_prefix": f"{construct_id}/",
+            }
+        return ecs.LogDrivers.firelens(options=options)
+
+    def _container_image(
+        self, props: ServiceProps, registry_cache: RegistryCacheStack
+    ) -> ecs.ContainerImage:
+        """
+        The container image built from source, pulled through the registry cache or
+        pulled from its registry
+        """
+        self.image_asset = None
+        if props.container_from_path:  # build container from source
+            platform = CPU_ARCHITECTURE_PLATFORMS[props.cpu_architecture]
+            self.image_asset = ecr_assets.DockerImageAsset(
+                self,
+                "ImageAsset",
+                directory=props.container_location,
+                platform=ecr_assets.Platform.custom(platform),
+            )
+            image = ecs.ContainerImage.from_docker_image_asset(self.image_asset)
+            if props.soci_index:
+                SociIndexBuild(self, "SociIndex", self.image_asset, platform)
+        elif registry_cache and registry_cache.cached_image(props.container_location):
+            # pull from the in-region cache of the upstream registry
+            repository_name, tag = registry_cache.cached_image(props.container_location)
+            image = ecs.ContainerImage.from_ecr_repository(
+                ecr.Repository.from_repository_name(
+                    self, "CachedRepository", repository_name
+                ),
+                tag,
+            )
+            registry_cache.grant_pull(self.task_definition.obtain_execution_role())
+        else:
+            image = ecs.ContainerImage.from_registry(props.container_location)
+
+        if props.soci_index and not self.image_asset:
+            # Fargate only lazy loads images with a SOCI index stored in ECR next to the image
+            cdk.Annotations.of(self).add_warning(
+                f"{props.container_name} SOCI index is not generated for registry images, "
+                "push the index with the image to an ECR repository to lazy load it"
+            )
+
+        return image
+
 
 class LoadBalancedServiceStack(ServiceStack):
     """
@@ -153,6 +439,8 @@ class LoadBalancedServiceStack(ServiceStack):
 
     To work around this problem we use the "Split at listener" option from
     https://github.com/aws-samples/aws-cdk-examples
+
+    load_balancing: the target group properties (LoadBalancingProps), None for the defaults
     """
 
     def __init__(
@@ -164,12 +452,13 @@ class LoadBalancedServiceStack(ServiceStack):
         props: ServiceProps,
         load_balancer: elbv2.ApplicationLoadBalancer,
         certificate_arn: str,
-        health_check_path: str = "/",
-        health_check_interval: int = 1,  # max is 5
+        load_balancing: LoadBalancingProps = None,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, vpc, cluster, props, **kwargs)
 
+        load_balancing = load_balancing or LoadBalancingProps()
+
         # -------------------
         # ACM Certificate for HTTPS
         # -------------------
@@ -190,16 +479,46 @@ class LoadBalancedServiceStack(ServiceStack):
             certificates=[self.cert],
         )
 
-        https_listener.add_targets(
+        self.target_group = https_listener.add_targets(
             "HttpsTarget",
             port=props.container_port,
             protocol=elbv2.ApplicationProtocol.HTTP,
             targets=[self.service],
             health_check=elbv2.HealthCheck(
-                path=health_check_path, interval=duration.minutes(health_check_interval)
+                path=load_balancing.health_check_path,
+                interval=duration.seconds(load_balancing.health_check_interval),
+                timeout=(
+                    duration.seconds(load_balancing.health_check_timeout)
+                    if load_balancing.health_check_timeout
+                    else None
+                ),
+                healthy_threshold_count=load_balancing.healthy_threshold,
+                unhealthy_threshold_count=load_balancing.unhealthy_threshold,
+            ),
+            slow_start=(
+                duration.seconds(load_balancing.slow_start)
+                if load_balancing.slow_start
+                else None
+            ),
+            deregistration_delay=duration.seconds(load_balancing.deregistration_delay),
+            load_balancing_algorithm_type=(
+                elbv2.TargetGroupLoadBalancingAlgorithmType.LEAST_OUTSTANDING_REQUESTS
+                if load_balancing.least_outstanding_requests
+                else elbv2.TargetGroupLoadBalancingAlgorithmType.ROUND_ROBIN
             ),
         )
 
+        # scale on the number of requests each task receives
+        if self.scalable_target is not None and props.auto_scaling.requests_per_target:
+            scaling = props.auto_scaling
+            self.scalable_target.scale_on_request_count(
+                "RequestCountScaling",
+                requests_per_target=scaling.requests_per_target,
+                target_group=self.target_group,
+                scale_in_cooldown=duration.seconds(scaling.scale_in_cooldown),
+                scale_out_cooldown=duration.seconds(scaling.scale_out_cooldown),
+            )
+
         # -------------------------------
         # redirect http to https
         # -------------------------------
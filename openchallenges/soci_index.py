@@ -0,0 +1,104 @@
+from aws_cdk import (
+    aws_codebuild as codebuild,
+    aws_ecr_assets as ecr_assets,
+    aws_iam as iam,
+    custom_resources as cr,
+)
+
+from constructs import Construct
+
+SOCI_SNAPSHOTTER_VERSION = "0.8.0"
+
+
+class SociIndexBuild(Construct):
+    """
+    Generate a Seekable OCI (SOCI) index of a container image asset and push it to the
+    image ECR repository, Fargate lazy loads the image layers of images with a SOCI index.
+
+    The index is built by a CodeBuild project started on every deployment changing the
+    image.  The build runs in the background, tasks started before it completes pull the
+    whole image.
+
+    image_asset: the container image asset to index
+    platform: the image platform to index (i.e. linux/arm64)
+    """
+
+    def __init__(
+        self,
+        scope: Construct,
+        construct_id: str,
+        image_asset: ecr_assets.DockerImageAsset,
+        platform: str,
+    ) -> None:
+        super().__init__(scope, construct_id)
+
+        self.project = codebuild.Project(
+            self,
+            "Project",
+            environment=codebuild.BuildEnvironment(
+                build_image=codebuild.LinuxBuildImage.STANDARD_7_0,
+                # containerd holds the image content indexed by soci
+                privileged=True,
+            ),
+            environment_variables={
+                "SOCI_SNAPSHOTTER_VERSION": codebuild.BuildEnvironmentVariable(
+                    value=SOCI_SNAPSHOTTER_VERSION
+                ),
+            },
+            build_spec=codebuild.BuildSpec.from_object(
+                {
+                    "version": "0.2",
+                    "phases": {
+                        "install": {
+                            "commands": [
+                                "curl -fsSL -o /tmp/soci.tar.gz https://github.com/awslabs/soci-snapshotter/"
+                                "releases/download/v${SOCI_SNAPSHOTTER_VERSION}/"
+                                "soci-snapshotter-${SOCI_SNAPSHOTTER_VERSION}-linux-amd64.tar.gz",
+                                "tar -C /usr/local/bin -xzf /tmp/soci.tar.gz soci",
+                                "nohup containerd > /tmp/containerd.log 2>&1 &",
+                                "sleep 5",
+                            ]
+                        },
+                        "build": {
+                            "commands": [
+                                "PASSWORD=$(aws ecr get-login-password)",
+                                'ctr image pull --platform "$PLATFORM" --user "AWS:$PASSWORD" "$IMAGE_URI"',
+                                'soci create --platform "$PLATFORM" "$IMAGE_URI"',
+                                'soci push --platform "$PLATFORM" --user "AWS:$PASSWORD" "$IMAGE_URI"',
+                            ]
+                        },
+                    },
+                }
+            ),
+        )
+        image_asset.repository.grant_pull_push(self.project)
+
+        # start a build whenever the image changes
+        start_build = cr.AwsSdkCall(
+            service="CodeBuild",
+            action="startBuild",
+            parameters={
+                "projectName": self.project.project_name,
+                "environmentVariablesOverride": [
+                    {"name": "IMAGE_URI", "value": image_asset.image_uri},
+                    {"name": "PLATFORM", "value": platform},
+                ],
+            },
+            physical_resource_id=cr.PhysicalResourceId.of(image_asset.asset_hash),
+        )
+        cr.AwsCustomResource(
+            self,
+            "StartBuild",
+            on_create=start_build,
+            on_update=start_build,
+            policy=cr.AwsCustomResourcePolicy.from_statements(
+                [
+                    iam.PolicyStatement(
+                        actions=["codebuild:StartBuild"],
+                        resources=[self.project.project_arn],
+                        effect=iam.Effect.ALLOW,
+                    )
+                ]
+            ),
+            install_latest_aws_sdk=False,
+        )
@@ -0,0 +1,226 @@
+"""
+Stack dependency graph of the app.
+
+Reports which stacks can be deployed in parallel and the critical path of a full
+deployment.  For the declared stack dependencies (see StackRegistry) it also reports the
+dependencies made redundant by transitive dependencies.
+
+Usage:
+    python -m openchallenges.stack_graph [cdk.out] [--max-parallelism]
+"""
+
+import argparse
+import json
+import os
+
+CLOUDFORMATION_STACK_ARTIFACT = "aws:cloudformation:stack"
+
+
+class StackGraph:
+    """
+    Directed acyclic graph of stack dependencies
+
+    dependencies: the names of the stacks each stack depends on, keyed by stack name
+    durations: the (estimated) deploy duration of each stack, keyed by stack name,
+      stacks without duration count as 1
+    declared: whether the dependencies are the declared ones, the dependencies CDK adds
+      for cross stack references can't be removed and are not reported as redundant
+    """
+
+    def __init__(
+        self, dependencies: dict, durations: dict = None, declared: bool = True
+    ) -> None:
+        self.dependencies = {
+            name: list(dict.fromkeys(depends_on))
+            for name, depends_on in dependencies.items()
+        }
+        self.durations = durations or {}
+        self.declared = declared
+        self._order = self._topological_order()
+
+    @classmethod
+    def from_registry(cls, registry, names: list = None) -> "StackGraph":
+        """
+        The graph of the stacks declared in a StackRegistry, limited to the given
+        stacks and their dependencies
+        """
+        entries = {entry.name: entry for entry in registry.entries}
+        return cls(
+            {
+                name: entries[name].depends_on
+                for name in registry.resolve(names or registry.names)
+            }
+        )
+
+    @classmethod
+    def from_manifest(cls, cloud_assembly_dir: str) -> "StackGraph":
+        """
+        The graph of the stacks in a synthesized cloud assembly (i.e. cdk.out),
+        including the dependencies CDK added for cross stack references
+        """
+        with open(os.path.join(cloud_assembly_dir, "manifest.json")) as f:
+            artifacts = json.load(f)["artifacts"]
+        stacks = [
+            name
+            for name, artifact in artifacts.items()
+            if artifact["type"] == CLOUDFORMATION_STACK_ARTIFACT
+        ]
+        return cls(
+            {
+                name: [
+                    dependency
+                    for dependency in artifacts[name].get("dependencies", [])
+                    if dependency in stacks
+                ]
+                for name in stacks
+            },
+            declared=False,
+        )
+
+    def _topological_order(self) -> list:
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                cycle = " -> ".join(path + [name])
+                raise ValueError(f"Stack dependency cycle {cycle}")
+            if name not in self.dependencies:
+                raise ValueError(f"Unknown stack {name}")
+            state[name] = "visiting"
+            for dependency in self.dependencies[name]:
+                visit(dependency, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.dependencies:
+            visit(name, [])
+        return order
+
+    def ancestors(self, name: str) -> set:
+        """
+        The transitive dependencies of a stack
+        """
+        ancestors = set()
+        pending = list(self.dependencies[name])
+        while pending:
+            dependency = pending.pop()
+            if dependency not in ancestors:
+                ancestors.add(dependency)
+                pending.extend(self.dependencies[dependency])
+        return ancestors
+
+    def transitive_reduction(self) -> dict:
+        """
+        The dependencies of each stack without the dependencies already implied by
+        another dependency (i.e. apex -> network is dropped when apex -> ecs -> network)
+        """
+        return {
+            name: [
+                dependency
+                for dependency in depends_on
+                if not any(
+                    dependency in self.ancestors(other)
+                    for other in depends_on
+                    if other != dependency
+                )
+            ]
+            for name, depends_on in self.dependencies.items()
+        }
+
+    def redundant_dependencies(self) -> list:
+        """
+        The (stack, dependency) pairs dropped by the transitive reduction
+        """
+        reduced = self.transitive_reduction()
+        return [
+            (name, dependency)
+            for name, depends_on in self.dependencies.items()
+            for dependency in depends_on
+            if dependency not in reduced[name]
+        ]
+
+    def levels(self) -> list:
+        """
+        The stacks grouped in deployment waves, the stacks of a wave only depend on
+        stacks of previous waves and can be deployed in parallel
+        """
+        level = {}
+        for name in self._order:
+            level[name] = 1 + max(
+                (level[dependency] for dependency in self.dependencies[name]),
+                default=-1,
+            )
+        waves = [[] for _ in range(max(level.values(), default=-1) + 1)]
+        for name in self._order:
+            waves[level[name]].append(name)
+        return waves
+
+    def max_parallelism(self) -> int:
+        """
+        The largest number of stacks that can be deployed at the same time
+        """
+        return max((len(wave) for wave in self.levels()), default=0)
+
+    def critical_path(self) -> list:
+        """
+        The longest chain of dependent stacks (weighted by the stack durations),
+        which bounds the wall time of a full deployment
+        """
+        finish = {}
+        previous = {}
+        for name in self._order:
+            start = 0
+            for dependency in self.dependencies[name]:
+                if finish[dependency] > start:
+                    start = finish[dependency]
+                    previous[name] = dependency
+            finish[name] = start + self.durations.get(name, 1)
+
+        if not finish:
+            return []
+        path = [max(finish, key=finish.get)]
+        while path[-1] in previous:
+            path.append(previous[path[-1]])
+        return list(reversed(path))
+
+    def format(self) -> str:
+        lines = ["deployment waves:"]
+        for i, wave in enumerate(self.levels(), start=1):
+            lines.append(f"  {i}: {', '.join(wave)}")
+        lines.append(f"max parallelism: {self.max_parallelism()}")
+        lines.append(f"critical path: {' -> '.join(self.critical_path())}")
+        redundant = self.redundant_dependencies() if self.declared else []
+        if redundant:
+            lines.append("redundant declared dependencies:")
+            for name, dependency in redundant:
+                lines.append(f"  {name} -> {dependency}")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "cloud_assembly_dir",
+        nargs="?",
+        default="cdk.out",
+        help="the synthesized cloud assembly directory",
+    )
+    parser.add_argument(
+        "--max-parallelism",
+        action="store_true",
+        help="only print the largest number of stacks that can be deployed in parallel",
+    )
+    args = parser.parse_args()
+
+    graph = StackGraph.from_manifest(args.cloud_assembly_dir)
+    if args.max_parallelism:
+        print(graph.max_parallelism())
+    else:
+        print(graph.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+from typing import Callable
+
+import aws_cdk as cdk
+
+from openchallenges.stack_graph import StackGraph
+
+
+class StackEntry:
+    """
+    A stack registered in the StackRegistry
+
+    name: the short name of the stack (i.e. thumbor)
+    factory: a function creating the stack, called with the registry
+    depends_on: the names of the stacks this stack depends on
+    secrets: the names of the secrets used by this stack
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable,
+        depends_on: list,
+        secrets: list,
+    ) -> None:
+        self.name = name
+        self.factory = factory
+        self.depends_on = depends_on
+        self.secrets = secrets
+
+
+class StackRegistry:
+    """
+    Registry of the app stacks, their dependencies and the secrets they use.
+
+    Stacks are registered with a factory and are only constructed when `build` selects
+    them or one of the stacks depending on them.  Only the secrets used by the constructed
+    stacks are retrieved.  While a stack is constructed its factory can only access the
+    stacks it depends on (i.e. `registry["network"].vpc`) and its own secrets
+    (i.e. `registry.secrets["SECURITY_KEY"]`), so missing declarations fail on every synth
+    and not only when a subset of the stacks is selected.
+    """
+
+    def __init__(self) -> None:
+        self._entries = {}
+        self._stacks = {}
+        self._secrets = {}
+        self._building = None
+
+    def add(
+        self,
+        name: str,
+        factory: Callable[["StackRegistry"], cdk.Stack],
+        depends_on: list = None,
+        secrets: list = None,
+    ) -> None:
+        if name in self._entries:
+            raise ValueError(f"Stack {name} is already registered")
+        self._entries[name] = StackEntry(name, factory, depends_on or [], secrets or [])
+
+    @property
+    def names(self) -> list:
+        return list(self._entries)
+
+    @property
+    def entries(self) -> list:
+        return list(self._entries.values())
+
+    @property
+    def stacks(self) -> dict:
+        """
+        The constructed stacks keyed by name
+        """
+        return dict(self._stacks)
+
+    @property
+    def secrets(self) -> dict:
+        """
+        The secrets of the stack being constructed
+        """
+        entry = self._entries[self._building]
+        return {key: self._secrets[key] for key in entry.secrets}
+
+    def __getitem__(self, name: str) -> cdk.Stack:
+        if self._building is not None and name not in self.resolve([self._building]):
+            raise KeyError(
+                f"Stack {self._building} does not declare a dependency on {name}"
+            )
+        return self._stacks[name]
+
+    def resolve(self, names: list) -> list:
+        """
+        The given stacks and their transitive dependencies, dependencies first
+        """
+        resolved = []
+        visiting = []
+
+        def visit(name):
+            if name in resolved:
+                return
+            if name not in self._entries:
+                raise ValueError(f"Unknown stack {name}")
+            if name in visiting:
+                cycle = " -> ".join(visiting + [name])
+                raise ValueError(f"Stack dependency cycle {cycle}")
+            visiting.append(name)
+            for dependency in self._entries[name].depends_on:
+                visit(dependency)
+            visiting.pop()
+            resolved.append(name)
+
+        for name in names:
+            visit(name)
+        return resolved
+
+    def build(self, get_secrets: Callable[[list], dict], names: list = None) -> dict:
+        """
+        Construct the selected stacks (all the stacks when `names` is empty) and their
+        dependencies.  `get_secrets` is called once with the names of the secrets used
+        by the constructed stacks and returns their values.  Stack dependencies implied
+        by other dependencies are not added, to keep the deployment graph minimal.
+
+        With a partial selection the dependencies only export the values used by the
+        constructed stacks, deploying them would delete the exports still imported by the
+        other stacks, so they get a warning to deploy the selection with `--exclusively`.
+        """
+        order = self.resolve(names or self.names)
+        dependencies = StackGraph.from_registry(self, order).transitive_reduction()
+        secret_names = sorted(
+            {secret for name in order for secret in self._entries[name].secrets}
+        )
+        self._secrets = get_secrets(secret_names) if secret_names else {}
+
+        for name in order:
+            if name in self._stacks:
+                continue
+            entry = self._entries[name]
+            self._building = name
+            try:
+                stack = entry.factory(self)
+            finally:
+                self._building = None
+            for dependency in dependencies[name]:
+                stack.add_dependency(self._stacks[dependency])
+            if names and name not in names:
+                cdk.Annotations.of(stack).add_warning(
+                    f"{stack.stack_name} is only synthesized as a dependency of "
+                    f"{', '.join(names)} and is missing the exports of the other stacks, "
+                    "do not deploy it (use cdk deploy --exclusively)"
+                )
+            self._stacks[name] = stack
+
+        return self.stacks
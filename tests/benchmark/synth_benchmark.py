@@ -0,0 +1,257 @@
+"""
+Synth benchmark for the OpenChallenges CDK app.
+
+Synthesizes the whole app (app.py) offline, with stubbed context and secrets,
+and reports the construction time of each stack, the secrets retrieval time,
+the synth time and the peak memory.
+
+Usage:
+    python -m tests.benchmark.synth_benchmark [--env dev] [--profile synth.prof] [--trace-memory]
+        [--update-baseline]
+
+The profile can be inspected with `python -m pstats synth.prof`.  `--update-baseline`
+saves the stack and total times to the baseline checked by the benchmark test.
+"""
+
+import argparse
+import cProfile
+import functools
+import importlib
+import json
+import os
+import pkgutil
+import runpy
+import tempfile
+import time
+import tracemalloc
+
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+import aws_cdk as cdk
+
+import openchallenges
+import openchallenges.utils as utils
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+APP_PATH = ROOT_DIR / "app.py"
+CDK_JSON_PATH = ROOT_DIR / "cdk.json"
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+
+class SynthReport:
+    """
+    Synth benchmark results
+
+    stack_seconds: construction time (seconds) of each stack, keyed by construct id
+    secrets_seconds: time (seconds) spent retrieving secrets
+    synth_seconds: time (seconds) spent in `app.synth()`
+    total_seconds: wall time (seconds) of the whole app run
+    peak_memory_bytes: peak memory allocated by python during the app run,
+      None when memory is not traced
+    """
+
+    def __init__(self) -> None:
+        self.stack_seconds = {}
+        self.secrets_seconds = 0.0
+        self.synth_seconds = 0.0
+        self.total_seconds = 0.0
+        self.peak_memory_bytes = None
+
+    def format(self) -> str:
+        lines = ["stack construction time:"]
+        for construct_id, seconds in sorted(
+            self.stack_seconds.items(), key=lambda item: item[1], reverse=True
+        ):
+            lines.append(f"  {construct_id:<50} {seconds:8.3f}s")
+        lines.append(f"{'stacks total':<52} {sum(self.stack_seconds.values()):8.3f}s")
+        lines.append(f"{'secrets':<52} {self.secrets_seconds:8.3f}s")
+        lines.append(f"{'synth':<52} {self.synth_seconds:8.3f}s")
+        lines.append(f"{'total':<52} {self.total_seconds:8.3f}s")
+        if self.peak_memory_bytes is not None:
+            peak_memory_mib = self.peak_memory_bytes / 1024 / 1024
+            lines.append(f"{'peak memory':<52} {peak_memory_mib:8.1f}MiB")
+        return "\n".join(lines)
+
+    def save_baseline(self, path: Path = BASELINE_PATH) -> None:
+        baseline = {
+            "total_seconds": round(self.total_seconds, 3),
+            "stack_seconds": {
+                construct_id: round(seconds, 3)
+                for construct_id, seconds in sorted(self.stack_seconds.items())
+            },
+        }
+        with open(path, "w") as f:
+            json.dump(baseline, f, indent=2)
+            f.write("\n")
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def stub_context(environment: str) -> dict:
+    """
+    The cdk.json context with every secret replaced by a dummy value
+    """
+    with open(CDK_JSON_PATH) as f:
+        context = json.load(f)["context"]
+    context["secrets"] = {key: f"dummy-{key}" for key in context["secrets"]}
+    return context
+
+
+def stack_classes() -> list:
+    """
+    All the stack classes defined in the openchallenges package
+    """
+    for module in pkgutil.iter_modules(openchallenges.__path__):
+        importlib.import_module(f"openchallenges.{module.name}")
+
+    classes = []
+    pending = [cdk.Stack]
+    while pending:
+        cls = pending.pop()
+        for subclass in cls.__subclasses__():
+            pending.append(subclass)
+            if subclass.__module__.startswith("openchallenges."):
+                classes.append(subclass)
+    return classes
+
+
+@contextmanager
+def timed_stacks(report: SynthReport):
+    """
+    Time the construction of every openchallenges stack.  Stack constructors calling
+    their parent constructor (i.e. LoadBalancedServiceStack) are only timed once.
+    """
+    depth = [0]
+
+    def timed_init(init):
+        @functools.wraps(init)
+        def wrapper(self, scope, construct_id, *args, **kwargs):
+            depth[0] += 1
+            start = time.perf_counter()
+            try:
+                init(self, scope, construct_id, *args, **kwargs)
+            finally:
+                depth[0] -= 1
+                if depth[0] == 0:
+                    report.stack_seconds[construct_id] = time.perf_counter() - start
+
+        return wrapper
+
+    patches = [
+        mock.patch.object(cls, "__init__", timed_init(cls.__init__))
+        for cls in stack_classes()
+    ]
+    for patch in patches:
+        patch.start()
+    try:
+        yield
+    finally:
+        for patch in reversed(patches):
+            patch.stop()
+
+
+@contextmanager
+def timed_call(target, attribute: str, record):
+    original = getattr(target, attribute)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            record(time.perf_counter() - start)
+
+    with mock.patch.object(target, attribute, wrapper):
+        yield
+
+
+@contextmanager
+def stubbed_app(context: dict, outdir: str):
+    """
+    Create the app with the given context and output directory.  These can't be
+    passed through the CDK_CONTEXT_JSON/CDK_OUTDIR environment variables as the jsii
+    runtime is already running, with its own environment, once aws_cdk is imported.
+    """
+
+    class StubbedApp(cdk.App):
+        def __init__(self, **kwargs) -> None:
+            super().__init__(context=context, outdir=outdir, **kwargs)
+
+    with mock.patch.object(cdk, "App", StubbedApp):
+        yield
+
+
+def run(
+    environment: str = "dev", profile_path: str = None, trace_memory: bool = False
+) -> SynthReport:
+    """
+    Synthesize the app offline and return the benchmark report.  When `profile_path`
+    is set the run is profiled with cProfile and the stats are saved to that path.
+    When `trace_memory` is set the peak memory is traced with tracemalloc, this slows
+    down the run.
+    """
+    report = SynthReport()
+
+    def record_secrets(seconds):
+        report.secrets_seconds += seconds
+
+    def record_synth(seconds):
+        report.synth_seconds += seconds
+
+    with tempfile.TemporaryDirectory() as outdir:
+        env = {"ENV": environment, "SECRETS": "local"}
+        profiler = cProfile.Profile() if profile_path else None
+        with mock.patch.dict(os.environ, env), timed_stacks(report), timed_call(
+            utils, "get_secrets", record_secrets
+        ), timed_call(cdk.App, "synth", record_synth), stubbed_app(
+            stub_context(environment), outdir
+        ):
+            if trace_memory:
+                tracemalloc.start()
+            start = time.perf_counter()
+            if profiler:
+                profiler.enable()
+            try:
+                runpy.run_path(str(APP_PATH), run_name="__main__")
+            finally:
+                if profiler:
+                    profiler.disable()
+                report.total_seconds = time.perf_counter() - start
+                if trace_memory:
+                    report.peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--env", default="dev", help="the environment to synthesize")
+    parser.add_argument("--profile", help="save cProfile stats to this file")
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="trace the peak memory"
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help=f"save the times to {BASELINE_PATH.relative_to(ROOT_DIR)}",
+    )
+    args = parser.parse_args()
+
+    report = run(args.env, args.profile, args.trace_memory)
+    print(report.format())
+    if args.update_baseline:
+        report.save_baseline()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+
+from tests.benchmark import synth_benchmark
+
+# regression thresholds relative to the checked in baseline (baseline.json), the ratio
+# leaves room for CI runners about twice as slow as the machine that recorded it.
+# Stacks taking a fraction of a second get an absolute allowance for timer noise.
+MAX_RATIO = float(os.environ.get("SYNTH_BENCHMARK_MAX_RATIO", 3))
+STACK_NOISE_SECONDS = 0.25
+
+# absolute thresholds (seconds) overriding the baseline ones, for much slower machines
+SYNTH_MAX_SECONDS = os.environ.get("SYNTH_BENCHMARK_MAX_SECONDS")
+STACK_MAX_SECONDS = os.environ.get("SYNTH_BENCHMARK_STACK_MAX_SECONDS")
+
+
+def stack_max_seconds(baseline_seconds: float) -> float:
+    if STACK_MAX_SECONDS:
+        return float(STACK_MAX_SECONDS)
+    return max(baseline_seconds * MAX_RATIO, baseline_seconds + STACK_NOISE_SECONDS)
+
+
+def test_synth_benchmark():
+    baseline = synth_benchmark.load_baseline()
+    report = synth_benchmark.run("dev")
+    print(report.format())
+
+    assert "openchallenges-dev-apex" in report.stack_seconds
+    synth_max_seconds = (
+        float(SYNTH_MAX_SECONDS)
+        if SYNTH_MAX_SECONDS
+        else baseline["total_seconds"] * MAX_RATIO
+    )
+    assert report.total_seconds < synth_max_seconds
+
+    # stacks missing from the baseline are added by running with --update-baseline
+    slow_stacks = {
+        construct_id: seconds
+        for construct_id, seconds in report.stack_seconds.items()
+        if seconds > stack_max_seconds(baseline["stack_seconds"].get(construct_id, 0))
+    }
+    assert slow_stacks == {}
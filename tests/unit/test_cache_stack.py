@@ -0,0 +1,26 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from openchallenges.network_stack import NetworkStack
+from openchallenges.cache_stack import CacheStack
+
+
+def test_cache_replication_group():
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    cache = CacheStack(app, "CacheStack", network.vpc)
+    template = assertions.Template.from_stack(cache)
+    template.has_resource_properties(
+        "AWS::ElastiCache::ReplicationGroup",
+        {
+            "Engine": "valkey",
+            "ReplicasPerNodeGroup": 1,
+            "AutomaticFailoverEnabled": True,
+            "TransitEncryptionEnabled": True,
+        },
+    )
+    assert set(cache.env_vars) == {
+        "SPRING_DATA_REDIS_HOST",
+        "SPRING_DATA_REDIS_PORT",
+        "SPRING_DATA_REDIS_SSL_ENABLED",
+    }
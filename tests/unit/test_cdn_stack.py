@@ -0,0 +1,103 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from aws_cdk import aws_cloudfront as cloudfront
+
+from openchallenges.cdn_stack import CdnStack
+from openchallenges.load_balancer_stack import LoadBalancerStack
+from openchallenges.network_stack import NetworkStack
+
+CERTIFICATE_ARN = "arn:aws:acm:us-east-1:123456789012:certificate/abc"
+
+
+def create_cdn_template():
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    load_balancer = LoadBalancerStack(app, "LoadBalancerStack", network.vpc)
+    cdn = CdnStack(
+        app,
+        "CdnStack",
+        load_balancer.alb,
+        "openchallenges.io",
+        CERTIFICATE_ARN,
+        86400,
+    )
+    return assertions.Template.from_stack(cdn)
+
+
+def test_image_behavior_cached_for_max_age():
+    template = create_cdn_template()
+    policies = template.find_resources(
+        "AWS::CloudFront::CachePolicy",
+        {
+            "Properties": {
+                "CachePolicyConfig": assertions.Match.object_like(
+                    {"DefaultTTL": 86400, "MaxTTL": 86400, "MinTTL": 0}
+                )
+            }
+        },
+    )
+    assert len(policies) == 1
+    template.has_resource_properties(
+        "AWS::CloudFront::Distribution",
+        {
+            "DistributionConfig": assertions.Match.object_like(
+                {
+                    "CacheBehaviors": assertions.Match.array_with(
+                        [
+                            assertions.Match.object_like(
+                                {
+                                    "PathPattern": "/img/*",
+                                    "CachePolicyId": {"Ref": list(policies)[0]},
+                                }
+                            )
+                        ]
+                    )
+                }
+            )
+        },
+    )
+
+
+def test_api_and_default_behaviors_pass_through():
+    template = create_cdn_template()
+    pass_through = {
+        "CachePolicyId": cloudfront.CachePolicy.CACHING_DISABLED.cache_policy_id,
+        "OriginRequestPolicyId": (
+            cloudfront.OriginRequestPolicy.ALL_VIEWER.origin_request_policy_id
+        ),
+    }
+    template.has_resource_properties(
+        "AWS::CloudFront::Distribution",
+        {
+            "DistributionConfig": assertions.Match.object_like(
+                {
+                    "DefaultCacheBehavior": assertions.Match.object_like(pass_through),
+                    "CacheBehaviors": assertions.Match.array_with(
+                        [
+                            assertions.Match.object_like(
+                                {"PathPattern": "/api/*", **pass_through}
+                            )
+                        ]
+                    ),
+                }
+            )
+        },
+    )
+
+
+def test_distribution_alias_and_certificate():
+    template = create_cdn_template()
+    template.has_resource_properties(
+        "AWS::CloudFront::Distribution",
+        {
+            "DistributionConfig": assertions.Match.object_like(
+                {
+                    "Aliases": ["openchallenges.io"],
+                    "ViewerCertificate": assertions.Match.object_like(
+                        {"AcmCertificateArn": CERTIFICATE_ARN}
+                    ),
+                }
+            )
+        },
+    )
@@ -0,0 +1,34 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from openchallenges.network_stack import NetworkStack
+from openchallenges.database_stack import DatabaseStack
+
+
+def create_database_stack(readers):
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    return DatabaseStack(
+        app, "DatabaseStack", network.vpc, "maria", "dummy", readers=readers
+    )
+
+
+def test_database_readers_and_proxy():
+    database = create_database_stack(2)
+    template = assertions.Template.from_stack(database)
+    template.resource_count_is("AWS::RDS::DBInstance", 3)
+    template.resource_count_is("AWS::RDS::DBProxy", 1)
+    template.has_resource_properties(
+        "AWS::RDS::DBProxyEndpoint", {"TargetRole": "READ_ONLY"}
+    )
+    assert database.jdbc_url("challenge_service").startswith(
+        "jdbc:mysql:replication://"
+    )
+
+
+def test_database_without_readers():
+    database = create_database_stack(0)
+    template = assertions.Template.from_stack(database)
+    template.resource_count_is("AWS::RDS::DBInstance", 1)
+    template.resource_count_is("AWS::RDS::DBProxyEndpoint", 0)
+    assert database.jdbc_url("challenge_service").startswith("jdbc:mysql://")
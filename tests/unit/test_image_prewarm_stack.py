@@ -0,0 +1,172 @@
+import http.server
+import threading
+from unittest import mock
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from openchallenges.bucket_stack import BucketStack
+from openchallenges.ecs_stack import EcsStack
+from openchallenges.functions.image_prewarm import handler
+from openchallenges.image_prewarm_stack import ImagePrewarmStack
+from openchallenges.network_stack import NetworkStack
+from openchallenges.service_props import ServiceProps
+from openchallenges.service_stack import ServiceStack
+
+
+def create_image_prewarm_stack(**kwargs):
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    ecs = EcsStack(app, "EcsStack", network.vpc, "openchallenges.io")
+    buckets = BucketStack(app, "BucketStack")
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-thumbor:latest",
+        {},
+    )
+    thumbor = ServiceStack(app, "ThumborStack", network.vpc, ecs.cluster, props)
+    return ImagePrewarmStack(
+        app,
+        "ImagePrewarmStack",
+        buckets.openchallenges_img_bucket,
+        thumbor.service,
+        "https://openchallenges.io/img",
+        "security-key",
+        **kwargs,
+    )
+
+
+def test_image_prewarm():
+    prewarm = create_image_prewarm_stack(sizes=["0x100", "0x500"], concurrency=4)
+    template = assertions.Template.from_stack(prewarm)
+    template.has_resource_properties(
+        "AWS::Lambda::Function",
+        {
+            "Environment": {
+                "Variables": assertions.Match.object_like(
+                    {"THUMBNAIL_SIZES": "0x100,0x500", "CONCURRENCY": "4"}
+                )
+            }
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": assertions.Match.object_like(
+                {"source": ["aws.s3"], "detail-type": ["Object Created"]}
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "EventPattern": assertions.Match.object_like(
+                {"detail": {"eventName": ["SERVICE_DEPLOYMENT_COMPLETED"]}}
+            )
+        },
+    )
+
+
+def test_invalid_image_prewarm():
+    with pytest.raises(ValueError):
+        create_image_prewarm_stack(concurrency=0)
+
+
+class FakeS3:
+    """S3 stand-in listing the keys one page at a time"""
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def list_objects_v2(self, Bucket, Prefix, ContinuationToken="0"):
+        start = int(ContinuationToken)
+        keys = [key for key in self.keys if key.startswith(Prefix)]
+        page = keys[start : start + 2]
+        response = {
+            "Contents": [
+                {"Key": key, "Size": 0 if key.endswith("/") else 1} for key in page
+            ],
+            "IsTruncated": start + 2 < len(keys),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + 2)
+        return response
+
+
+@pytest.fixture
+def thumbor():
+    """Stub thumbor server recording the requested paths, missing.png is not found"""
+    paths = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            paths.append(self.path)
+            self.send_response(404 if "missing.png" in self.path else 200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/img", paths
+    server.shutdown()
+
+
+@pytest.fixture
+def environment(thumbor):
+    base_url, _ = thumbor
+    env = {
+        "BUCKET_NAME": "images",
+        "ROOT_PATH": "img",
+        "BASE_URL": base_url,
+        "SECURITY_KEY": "security-key",
+        "THUMBNAIL_SIZES": "0x100,0x500",
+        "CONCURRENCY": "2",
+    }
+    with mock.patch.dict("os.environ", env):
+        yield
+
+
+def test_sign():
+    # the signature libthumbor generates for the same key and path
+    assert (
+        handler.sign(
+            "MY_SECURE_KEY", "300x200/smart/my.server.com/some/path/to/image.jpg"
+        )
+        == "OHHMqHwGrH1gubkMMveC8Ireg7A="
+    )
+
+
+def test_prewarm_all_images(thumbor, environment):
+    _, paths = thumbor
+    s3 = FakeS3(["img/", "img/a.png", "img/b c.png", "img/missing.png", "other/d.png"])
+    with mock.patch.object(handler.boto3, "client", return_value=s3):
+        result = handler.on_event({"source": "aws.ecs"}, None)
+
+    assert result == {"requested": 6, "failed": 2}
+    assert sorted(path.split("/", 3)[3] for path in paths) == [
+        "0x100/a.png",
+        "0x100/b%20c.png",
+        "0x100/missing.png",
+        "0x500/a.png",
+        "0x500/b%20c.png",
+        "0x500/missing.png",
+    ]
+
+
+def test_prewarm_uploaded_image(thumbor, environment):
+    _, paths = thumbor
+    event = {
+        "source": "aws.s3",
+        "detail": {"bucket": {"name": "images"}, "object": {"key": "img/a.png"}},
+    }
+    result = handler.on_event(event, None)
+
+    signature = handler.sign("security-key", "0x100/a.png")
+    assert result == {"requested": 2, "failed": 0}
+    assert f"/img/{signature}/0x100/a.png" in paths
@@ -1,5 +1,6 @@
 import aws_cdk as core
 import aws_cdk.assertions as assertions
+import pytest
 
 from openchallenges.network_stack import NetworkStack
 
@@ -15,3 +16,30 @@ def test_vpc_created():
     network = NetworkStack(app, "NetworkStack", vpc_cidr)
     template = assertions.Template.from_stack(network)
     template.has_resource_properties("AWS::EC2::VPC", {"CidrBlock": vpc_cidr})
+
+
+def test_vpc_endpoints():
+    app = core.App()
+    network = NetworkStack(
+        app, "NetworkStack", "10.255.92.0/24", interface_endpoints=["ecr", "logs"]
+    )
+    template = assertions.Template.from_stack(network)
+    template.has_resource_properties(
+        "AWS::EC2::VPCEndpoint",
+        {
+            "ServiceName": {
+                "Fn::Join": ["", ["com.amazonaws.", {"Ref": "AWS::Region"}, ".s3"]]
+            },
+            "VpcEndpointType": "Gateway",
+        },
+    )
+    template.resource_properties_count_is(
+        "AWS::EC2::VPCEndpoint", {"VpcEndpointType": "Interface"}, 2
+    )
+    assert list(network.interface_endpoints) == ["ecr", "logs"]
+
+
+def test_unknown_vpc_endpoint():
+    app = core.App()
+    with pytest.raises(ValueError):
+        NetworkStack(app, "NetworkStack", "10.255.92.0/24", interface_endpoints=["s4"])
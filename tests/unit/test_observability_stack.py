@@ -0,0 +1,44 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from openchallenges.network_stack import NetworkStack
+from openchallenges.ecs_stack import EcsStack
+from openchallenges.observability_stack import ObservabilityStack
+from openchallenges.service_stack import ServiceStack
+from openchallenges.service_props import ServiceProps, AlarmProps
+
+
+def test_service_dashboard_and_alarms():
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    ecs = EcsStack(app, "EcsStack", network.vpc, "openchallenges.io")
+    props = ServiceProps(
+        "openchallenges-api-gateway",
+        8082,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-api-gateway:latest",
+        {},
+        alarms=AlarmProps(
+            cpu_utilization=80, memory_utilization=None, response_time_p99=2
+        ),
+    )
+    service = ServiceStack(app, "ApiGatewayStack", network.vpc, ecs.cluster, props)
+    observability = ObservabilityStack(app, "ObservabilityStack", [service])
+    template = assertions.Template.from_stack(observability)
+    template.resource_count_is("AWS::CloudWatch::Dashboard", 1)
+    template.resource_count_is("AWS::CloudWatch::Alarm", 2)
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm", {"MetricName": "CPUUtilization", "Threshold": 80}
+    )
+    template.has_resource_properties(
+        "AWS::CloudWatch::Alarm",
+        {
+            "MetricName": "TargetResponseTime",
+            "ExtendedStatistic": "p99",
+            "Threshold": 2000,
+        },
+    )
+    assertions.Template.from_stack(ecs).has_resource_properties(
+        "AWS::ECS::Cluster",
+        {"ClusterSettings": [{"Name": "containerInsights", "Value": "enabled"}]},
+    )
@@ -0,0 +1,37 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+
+from openchallenges.registry_cache_stack import RegistryCacheStack
+
+CREDENTIAL_ARN = (
+    "arn:aws:secretsmanager:us-east-1:123456789012:secret:ecr-pullthroughcache/ghcr"
+)
+
+
+def test_pull_through_cache_rule():
+    app = core.App()
+    cache = RegistryCacheStack(app, "RegistryCacheStack", CREDENTIAL_ARN)
+    template = assertions.Template.from_stack(cache)
+    template.has_resource_properties(
+        "AWS::ECR::PullThroughCacheRule",
+        {
+            "CredentialArn": CREDENTIAL_ARN,
+            "EcrRepositoryPrefix": "ghcr",
+            "UpstreamRegistryUrl": "ghcr.io",
+        },
+    )
+
+
+def test_cached_image():
+    app = core.App()
+    cache = RegistryCacheStack(app, "RegistryCacheStack", CREDENTIAL_ARN)
+
+    assert cache.cached_image("ghcr.io/sage-bionetworks/openchallenges-app:0.0.11") == (
+        "ghcr/sage-bionetworks/openchallenges-app",
+        "0.0.11",
+    )
+    assert cache.cached_image("ghcr.io/sage-bionetworks/openchallenges-app") == (
+        "ghcr/sage-bionetworks/openchallenges-app",
+        "latest",
+    )
+    assert cache.cached_image("docker.io/library/nginx:1.27") is None
@@ -0,0 +1,71 @@
+import json
+from unittest import mock
+
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from openchallenges.functions.search_index_template import handler
+from openchallenges.network_stack import NetworkStack
+from openchallenges.search_stack import SearchStack
+
+
+def create_search_stack(**kwargs):
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    return SearchStack(app, "SearchStack", network.vpc, **kwargs)
+
+
+def test_search_domain():
+    search = create_search_stack(data_nodes=2, master_nodes=3, shards=3, replicas=1)
+    template = assertions.Template.from_stack(search)
+    template.has_resource_properties(
+        "AWS::OpenSearchService::Domain",
+        {
+            "ClusterConfig": assertions.Match.object_like(
+                {
+                    "InstanceCount": 2,
+                    "DedicatedMasterEnabled": True,
+                    "DedicatedMasterCount": 3,
+                    "ZoneAwarenessEnabled": True,
+                }
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudFormation::CustomResource", {"Shards": 3, "Replicas": 1}
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{"master_nodes": 2}, {"data_nodes": 1, "replicas": 1}]
+)
+def test_invalid_search_domain(kwargs):
+    with pytest.raises(ValueError):
+        create_search_stack(**kwargs)
+
+
+def test_index_template_handler():
+    event = {
+        "RequestType": "Create",
+        "ResourceProperties": {
+            "Endpoint": "vpc-search.us-east-1.es.amazonaws.com",
+            "Name": "openchallenges",
+            "IndexPatterns": ["*"],
+            "Shards": "3",
+            "Replicas": "1",
+        },
+    }
+    with mock.patch("urllib.request.urlopen") as urlopen:
+        response = handler.on_event(event, None)
+
+    req = urlopen.call_args[0][0]
+    assert req.full_url == (
+        "https://vpc-search.us-east-1.es.amazonaws.com/_index_template/openchallenges"
+    )
+    assert req.get_method() == "PUT"
+    assert json.loads(req.data)["template"]["settings"] == {
+        "number_of_shards": 3,
+        "number_of_replicas": 1,
+    }
+    assert response == {"PhysicalResourceId": "openchallenges"}
@@ -0,0 +1,129 @@
+import os
+import time
+
+import keyring
+import keyring.backend
+import pytest
+
+from botocore.stub import Stubber
+from keyring.backends import fail
+
+import openchallenges.utils as utils
+from openchallenges.secrets_cache import SecretsCache
+from tests.unit.test_utils import create_ssm_client, ssm_parameter
+
+PASSWORD_PARAM = "/openchallenges/MARIADB_PASSWORD"
+
+
+class MemoryKeyring(keyring.backend.KeyringBackend):
+    """OS keyring stand-in keeping the passwords in memory"""
+
+    priority = 1
+
+    def __init__(self):
+        super().__init__()
+        self.passwords = {}
+
+    def get_password(self, service, username):
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        self.passwords[(service, username)] = password
+
+    def delete_password(self, service, username):
+        del self.passwords[(service, username)]
+
+
+@pytest.fixture(autouse=True)
+def memory_keyring():
+    previous = keyring.get_keyring()
+    backend = MemoryKeyring()
+    keyring.set_keyring(backend)
+    yield backend
+    keyring.set_keyring(previous)
+
+
+def test_cache_round_trip(tmp_path):
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}})
+
+    assert cache.get([PASSWORD_PARAM, "/openchallenges/OTHER"]) == {
+        PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}
+    }
+    assert "secret-password" not in open(cache.cache_file).read()
+    assert (
+        SecretsCache("stage", 60, cache_dir=str(tmp_path)).get([PASSWORD_PARAM]) == {}
+    )
+
+
+def test_cache_key_not_stored_with_cache(tmp_path, memory_keyring):
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}})
+
+    assert os.listdir(tmp_path) == ["secrets-dev.json"]
+    assert list(memory_keyring.passwords) == [
+        ("openchallenges-cdk", "secrets-cache-key")
+    ]
+
+
+def test_cache_disabled_without_keyring(tmp_path):
+    keyring.set_keyring(fail.Keyring())
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    with pytest.warns(UserWarning, match="keyring"):
+        cache.put({PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}})
+
+    assert not os.path.exists(cache.cache_file)
+
+
+def test_cache_expires(tmp_path, monkeypatch):
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    assert cache.get([PASSWORD_PARAM]) == {}
+
+
+def test_cache_invalidate(tmp_path):
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "secret-password", "Version": 2}})
+    cache.invalidate()
+
+    assert cache.get([PASSWORD_PARAM]) == {}
+
+
+def test_get_ssm_secrets_uses_cache(tmp_path):
+    cache = SecretsCache("dev", 60, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "cached-password", "Version": 2}})
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        secrets = utils.get_ssm_secrets(
+            {"MARIADB_PASSWORD": PASSWORD_PARAM}, ssm, cache
+        )
+        stubber.assert_no_pending_responses()
+
+    assert secrets == {"MARIADB_PASSWORD": "cached-password"}
+
+
+def test_get_ssm_secrets_refreshes_stale_versions(tmp_path):
+    cache = SecretsCache("dev", 60, verify_versions=True, cache_dir=str(tmp_path))
+    cache.put({PASSWORD_PARAM: {"Value": "old-password", "Version": 2}})
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        stubber.add_response(
+            "describe_parameters",
+            {"Parameters": [{"Name": PASSWORD_PARAM, "Version": 3}]},
+        )
+        new_parameter = ssm_parameter(PASSWORD_PARAM, "new-password")
+        new_parameter["Version"] = 3
+        stubber.add_response(
+            "get_parameters",
+            {"Parameters": [new_parameter]},
+            {"Names": [PASSWORD_PARAM], "WithDecryption": True},
+        )
+        secrets = utils.get_ssm_secrets(
+            {"MARIADB_PASSWORD": PASSWORD_PARAM}, ssm, cache
+        )
+
+    assert secrets == {"MARIADB_PASSWORD": "new-password"}
+    assert cache.get([PASSWORD_PARAM])[PASSWORD_PARAM]["Version"] == 3
@@ -0,0 +1,155 @@
+import pytest
+
+from openchallenges.service_props import (
+    ServiceProps,
+    CapacityProps,
+    JvmProps,
+    LoadBalancingProps,
+    LoggingProps,
+    DeploymentProps,
+)
+
+
+def test_valid_task_size():
+    props = ServiceProps("openchallenges-apex", 8000, 200, "apex:latest", {}, 256, 512)
+    assert props.task_cpu == 256
+    assert props.task_memory == 512
+
+
+@pytest.mark.parametrize("task_cpu,task_memory", [(256, 4096), (1000, 2048)])
+def test_invalid_task_size(task_cpu, task_memory):
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-apex", 8000, 200, "apex:latest", {}, task_cpu, task_memory
+        )
+
+
+def test_container_memory_exceeds_task_memory():
+    with pytest.raises(ValueError):
+        ServiceProps("openchallenges-apex", 8000, 1024, "apex:latest", {}, 256, 512)
+
+
+def test_invalid_cpu_architecture():
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-apex",
+            8000,
+            200,
+            "apex:latest",
+            {},
+            256,
+            512,
+            cpu_architecture="ARM",
+        )
+
+
+def test_path_container_platform_mismatch(tmp_path):
+    (tmp_path / "Dockerfile").write_text(
+        "FROM --platform=$BUILDPLATFORM node:20 AS build\nFROM --platform=linux/amd64 nginx:1.27\n"
+    )
+    location = f"path://{tmp_path}"
+    props = ServiceProps("openchallenges-apex", 8000, 200, location, {}, 256, 512)
+    assert props.container_from_path
+    assert props.container_location == str(tmp_path)
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-apex",
+            8000,
+            200,
+            location,
+            {},
+            256,
+            512,
+            cpu_architecture="ARM64",
+        )
+
+
+@pytest.mark.parametrize(
+    "on_demand_base,on_demand_weight,spot_weight", [(-1, 1, 0), (0, 0, 0)]
+)
+def test_invalid_capacity(on_demand_base, on_demand_weight, spot_weight):
+    with pytest.raises(ValueError):
+        CapacityProps(on_demand_base, on_demand_weight, spot_weight)
+
+
+def test_jvm_java_tool_options():
+    jvm = JvmProps(heap_percentage=70, max_metaspace_size=256, cds_archive="/app.jsa")
+    assert jvm.java_tool_options() == (
+        "-XX:InitialRAMPercentage=70.0 -XX:MaxRAMPercentage=70.0 -XX:+UseG1GC "
+        "-XX:MaxMetaspaceSize=256m -Xshare:auto -XX:SharedArchiveFile=/app.jsa"
+    )
+
+
+def test_jvm_memory_exceeds_container_memory():
+    jvm = JvmProps(heap_percentage=75, max_metaspace_size=256)
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-api-gateway", 8082, 1792, "api:latest", {}, jvm=jvm
+        )
+
+
+def test_jvm_and_java_tool_options():
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-api-gateway",
+            8082,
+            2048,
+            "api:latest",
+            {"JAVA_TOOL_OPTIONS": "-Xmx1g"},
+            jvm=JvmProps(),
+        )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"health_check_interval": 1},
+        {"health_check_interval": 10, "health_check_timeout": 10},
+        {"health_check_interval": 5},
+        {"healthy_threshold": 1},
+        {"slow_start": 10},
+        {"slow_start": 60, "least_outstanding_requests": True},
+    ],
+)
+def test_invalid_load_balancing(kwargs):
+    with pytest.raises(ValueError):
+        LoadBalancingProps(**kwargs)
+
+
+def test_s3_logging_requires_firelens():
+    with pytest.raises(ValueError):
+        LoggingProps(firelens_bucket_name="openchallenges-logs")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"min_healthy_percent": 100, "max_healthy_percent": 100},
+        {"max_healthy_percent": 300},
+        {"health_check_start_period": 600},
+    ],
+)
+def test_invalid_deployment(kwargs):
+    with pytest.raises(ValueError):
+        DeploymentProps(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "endpoint",
+    [
+        "openchallenges-config-server:8090",
+        "http://openchallenges-config-server/actuator/health",
+        "https://openchallenges-config-server:8090/actuator/health",
+        "tcp://openchallenges-mariadb:3306/challenge_service",
+    ],
+)
+def test_invalid_wait_for_endpoint(endpoint):
+    with pytest.raises(ValueError):
+        ServiceProps(
+            "openchallenges-api-gateway",
+            8082,
+            1024,
+            "api:latest",
+            {},
+            wait_for=[endpoint],
+        )
@@ -0,0 +1,488 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from openchallenges.network_stack import NetworkStack
+from openchallenges.ecs_stack import EcsStack
+from openchallenges.registry_cache_stack import RegistryCacheStack
+from openchallenges.load_balancer_stack import LoadBalancerStack
+from openchallenges.service_stack import ServiceStack, LoadBalancedServiceStack
+from openchallenges.service_props import (
+    ServiceProps,
+    AutoScalingProps,
+    VolumeProps,
+    CapacityProps,
+    LoadBalancingProps,
+    LoggingProps,
+    DeploymentProps,
+)
+
+
+def create_service_stack(construct_id, props, **kwargs):
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    ecs = EcsStack(app, "EcsStack", network.vpc, "openchallenges.io")
+    return ServiceStack(app, construct_id, network.vpc, ecs.cluster, props, **kwargs)
+
+
+def test_service_auto_scaling():
+    props = ServiceProps(
+        "openchallenges-api-gateway",
+        8082,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-api-gateway:latest",
+        {},
+        auto_scaling=AutoScalingProps(
+            min_capacity=1, max_capacity=3, cpu_target_utilization=70
+        ),
+    )
+    service = create_service_stack("ApiGatewayStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {"MinCapacity": 1, "MaxCapacity": 3},
+    )
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalingPolicy", 1)
+
+
+def test_stateful_service_cannot_scale():
+    props = ServiceProps(
+        "openchallenges-mariadb",
+        3306,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-mariadb:latest",
+        {},
+        volume=VolumeProps("/data/db"),
+        auto_scaling=AutoScalingProps(max_capacity=2),
+    )
+    with pytest.raises(ValueError):
+        create_service_stack("MariaDbStack", props)
+
+
+def test_service_volume():
+    props = ServiceProps(
+        "openchallenges-mariadb",
+        3306,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-mariadb:latest",
+        {},
+        volume=VolumeProps("/data/db", size=50, iops=6000, throughput=250),
+    )
+    service = create_service_stack("MariaDbStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "VolumeConfigurations": [
+                assertions.Match.object_like(
+                    {
+                        "ManagedEBSVolume": assertions.Match.object_like(
+                            {
+                                "SizeInGiB": 50,
+                                "VolumeType": "gp3",
+                                "Iops": 6000,
+                                "Throughput": 250,
+                            }
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_service_shared_volume():
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-thumbor:latest",
+        {},
+        shared_volume_path="/data",
+    )
+    service = create_service_stack("ThumborStack", props)
+    template = assertions.Template.from_stack(service)
+    template.resource_count_is("AWS::EFS::FileSystem", 1)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "MountPoints": [
+                            {
+                                "ContainerPath": "/data",
+                                "ReadOnly": False,
+                                "SourceVolume": "openchallenges-thumbor-shared",
+                            }
+                        ]
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_arm64_runtime_platform():
+    props = ServiceProps(
+        "openchallenges-api-gateway",
+        8082,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-api-gateway:latest",
+        {},
+        cpu_architecture="ARM64",
+    )
+    service = create_service_stack("ApiGatewayStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "RuntimePlatform": {
+                "CpuArchitecture": "ARM64",
+                "OperatingSystemFamily": "LINUX",
+            }
+        },
+    )
+
+
+def test_spot_capacity():
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-thumbor:latest",
+        {},
+        capacity=CapacityProps(on_demand_base=1, on_demand_weight=1, spot_weight=3),
+    )
+    service = create_service_stack("ThumborStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "CapacityProviderStrategy": [
+                {"CapacityProvider": "FARGATE", "Base": 1, "Weight": 1},
+                {"CapacityProvider": "FARGATE_SPOT", "Weight": 3},
+            ],
+            "LaunchType": assertions.Match.absent(),
+        },
+    )
+
+
+def test_stateful_service_cannot_run_on_spot():
+    props = ServiceProps(
+        "openchallenges-mariadb",
+        3306,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-mariadb:latest",
+        {},
+        volume=VolumeProps("/data/db"),
+        capacity=CapacityProps(spot_weight=1),
+    )
+    with pytest.raises(ValueError):
+        create_service_stack("MariaDbStack", props)
+
+
+def test_registry_cache_image():
+    props = ServiceProps(
+        "openchallenges-app",
+        4200,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-app:0.0.11",
+        {},
+    )
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    ecs = EcsStack(app, "EcsStack", network.vpc, "openchallenges.io")
+    cache = RegistryCacheStack(
+        app,
+        "RegistryCacheStack",
+        "arn:aws:secretsmanager:us-east-1:123456789012:secret:ecr-pullthroughcache/ghcr",
+    )
+    service = ServiceStack(
+        app, "AppStack", network.vpc, ecs.cluster, props, registry_cache=cache
+    )
+    template = assertions.Template.from_stack(service)
+    image = template.find_resources("AWS::ECS::TaskDefinition")
+    image = list(image.values())[0]["Properties"]["ContainerDefinitions"][0]["Image"]
+    assert (
+        image["Fn::Join"][1][-1] == "/ghcr/sage-bionetworks/openchallenges-app:0.0.11"
+    )
+    template.has_resource_properties(
+        "AWS::IAM::Policy",
+        {
+            "PolicyDocument": {
+                "Statement": assertions.Match.array_with(
+                    [
+                        assertions.Match.object_like(
+                            {
+                                "Action": [
+                                    "ecr:BatchImportUpstreamImage",
+                                    "ecr:CreateRepository",
+                                ]
+                            }
+                        )
+                    ]
+                )
+            }
+        },
+    )
+
+
+def test_asset_soci_index(tmp_path):
+    (tmp_path / "Dockerfile").write_text("FROM nginx:1.27\n")
+    props = ServiceProps(
+        "openchallenges-apex",
+        8000,
+        200,
+        f"path://{tmp_path}",
+        {},
+        256,
+        512,
+        cpu_architecture="ARM64",
+        soci_index=True,
+    )
+    service = create_service_stack("ApexStack", props)
+    template = assertions.Template.from_stack(service)
+    template.resource_count_is("AWS::CodeBuild::Project", 1)
+    template.resource_count_is("Custom::AWS", 1)
+
+
+def test_registry_soci_index_warning():
+    props = ServiceProps(
+        "openchallenges-elasticsearch",
+        9200,
+        4096,
+        "ghcr.io/sage-bionetworks/openchallenges-elasticsearch:latest",
+        {},
+        soci_index=True,
+    )
+    service = create_service_stack("ElasticsearchStack", props)
+    assertions.Annotations.from_stack(service).has_warning(
+        "*", assertions.Match.string_like_regexp("SOCI index")
+    )
+
+
+def test_load_balanced_service():
+    props = ServiceProps(
+        "openchallenges-apex",
+        8000,
+        200,
+        "ghcr.io/sage-bionetworks/openchallenges-apex:latest",
+        {},
+        256,
+        512,
+        deployment=DeploymentProps(health_check_grace_period=45),
+    )
+    app = core.App()
+    network = NetworkStack(app, "NetworkStack", "10.255.92.0/24")
+    ecs = EcsStack(app, "EcsStack", network.vpc, "openchallenges.io")
+    load_balancer = LoadBalancerStack(app, "LoadBalancerStack", network.vpc)
+    service = LoadBalancedServiceStack(
+        app,
+        "ApexStack",
+        network.vpc,
+        ecs.cluster,
+        props,
+        load_balancer.alb,
+        "arn:aws:acm:us-east-1:123456789012:certificate/dummy",
+        load_balancing=LoadBalancingProps(
+            health_check_path="/health",
+            health_check_interval=10,
+            healthy_threshold=2,
+            deregistration_delay=30,
+            least_outstanding_requests=True,
+        ),
+    )
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ElasticLoadBalancingV2::TargetGroup",
+        {
+            "HealthCheckPath": "/health",
+            "HealthCheckIntervalSeconds": 10,
+            "HealthyThresholdCount": 2,
+            "TargetGroupAttributes": assertions.Match.array_with(
+                [
+                    {"Key": "deregistration_delay.timeout_seconds", "Value": "30"},
+                    {
+                        "Key": "load_balancing.algorithm.type",
+                        "Value": "least_outstanding_requests",
+                    },
+                ]
+            ),
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::Service", {"HealthCheckGracePeriodSeconds": 45}
+    )
+
+
+def test_non_blocking_logging():
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-thumbor:latest",
+        {},
+        logging=LoggingProps(max_buffer_size=8),
+    )
+    service = create_service_stack("ThumborStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "LogConfiguration": assertions.Match.object_like(
+                            {
+                                "LogDriver": "awslogs",
+                                "Options": assertions.Match.object_like(
+                                    {
+                                        "mode": "non-blocking",
+                                        "max-buffer-size": "8388608b",
+                                    }
+                                ),
+                            }
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_firelens_logging_to_s3():
+    props = ServiceProps(
+        "openchallenges-thumbor",
+        8889,
+        512,
+        "ghcr.io/sage-bionetworks/openchallenges-thumbor:latest",
+        {},
+        logging=LoggingProps(firelens=True, firelens_bucket_name="openchallenges-logs"),
+    )
+    service = create_service_stack("ThumborStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": assertions.Match.array_with(
+                [
+                    assertions.Match.object_like(
+                        {"FirelensConfiguration": {"Type": "fluentbit"}}
+                    ),
+                    assertions.Match.object_like(
+                        {
+                            "LogConfiguration": assertions.Match.object_like(
+                                {
+                                    "LogDriver": "awsfirelens",
+                                    "Options": assertions.Match.object_like(
+                                        {"Name": "s3", "compression": "gzip"}
+                                    ),
+                                }
+                            )
+                        }
+                    ),
+                ]
+            )
+        },
+    )
+
+
+def test_deployment_circuit_breaker_and_health_check():
+    props = ServiceProps(
+        "openchallenges-api-gateway",
+        8082,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-api-gateway:latest",
+        {},
+        deployment=DeploymentProps(
+            min_healthy_percent=50,
+            health_check_command=[
+                "CMD-SHELL",
+                "curl -f http://localhost:8082/actuator/health",
+            ],
+            health_check_start_period=120,
+        ),
+    )
+    service = create_service_stack("ApiGatewayStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::Service",
+        {
+            "DeploymentConfiguration": {
+                "DeploymentCircuitBreaker": {"Enable": True, "Rollback": True},
+                "MinimumHealthyPercent": 50,
+                "MaximumPercent": 200,
+            }
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "HealthCheck": assertions.Match.object_like(
+                            {"StartPeriod": 120, "Retries": 3}
+                        )
+                    }
+                )
+            ]
+        },
+    )
+
+
+def test_wait_for_endpoints():
+    endpoints = [
+        "http://openchallenges-config-server:8090/actuator/health",
+        "tcp://openchallenges-mariadb:3306",
+    ]
+    props = ServiceProps(
+        "openchallenges-challenge-service",
+        8085,
+        1024,
+        "ghcr.io/sage-bionetworks/openchallenges-challenge-service:latest",
+        {},
+        wait_for=endpoints,
+    )
+    service = create_service_stack("ChallengeServiceStack", props)
+    template = assertions.Template.from_stack(service)
+    template.has_resource_properties(
+        "AWS::ECS::TaskDefinition",
+        {
+            "ContainerDefinitions": [
+                assertions.Match.object_like(
+                    {
+                        "Name": "openchallenges-challenge-service",
+                        "DependsOn": [
+                            {"ContainerName": "wait-for", "Condition": "SUCCESS"}
+                        ],
+                    }
+                ),
+                assertions.Match.object_like(
+                    {
+                        "Name": "wait-for",
+                        "Essential": False,
+                        "EntryPoint": ["sh", "-c"],
+                        "Environment": assertions.Match.array_with(
+                            [{"Name": "WAIT_FOR", "Value": " ".join(endpoints)}]
+                        ),
+                    }
+                ),
+            ]
+        },
+    )
+
+    # the endpoints are probed at the protocol level, the Service Connect proxy accepts
+    # TCP connections without a healthy upstream
+    task_definition = template.find_resources("AWS::ECS::TaskDefinition")
+    (properties,) = [resource["Properties"] for resource in task_definition.values()]
+    (wait_for,) = [
+        container
+        for container in properties["ContainerDefinitions"]
+        if container["Name"] == "wait-for"
+    ]
+    (command,) = wait_for["Command"]
+    assert 'wget -q -T 2 -O /dev/null "$1"' in command
+    assert '| wc -c)" -gt 0 ]' in command
+    assert "nc -z" not in command
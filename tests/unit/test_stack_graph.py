@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from openchallenges.stack_graph import StackGraph
+
+DEPENDENCIES = {
+    "network": [],
+    "ecs": ["network"],
+    "mariadb": ["network", "ecs"],
+    "thumbor": ["network", "ecs"],
+    "challenge-service": ["ecs", "mariadb"],
+    "apex": ["network", "challenge-service", "thumbor"],
+}
+
+
+def test_transitive_reduction():
+    graph = StackGraph(DEPENDENCIES)
+
+    assert graph.transitive_reduction() == {
+        "network": [],
+        "ecs": ["network"],
+        "mariadb": ["ecs"],
+        "thumbor": ["ecs"],
+        "challenge-service": ["mariadb"],
+        "apex": ["challenge-service", "thumbor"],
+    }
+    assert ("apex", "network") in graph.redundant_dependencies()
+
+
+def test_levels():
+    graph = StackGraph(DEPENDENCIES)
+
+    assert graph.levels() == [
+        ["network"],
+        ["ecs"],
+        ["mariadb", "thumbor"],
+        ["challenge-service"],
+        ["apex"],
+    ]
+    assert graph.max_parallelism() == 2
+
+
+def test_critical_path_uses_durations():
+    graph = StackGraph(DEPENDENCIES, durations={"thumbor": 10})
+
+    assert graph.critical_path() == ["network", "ecs", "thumbor", "apex"]
+
+
+def test_cycle():
+    with pytest.raises(ValueError):
+        StackGraph({"a": ["b"], "b": ["a"]})
+
+
+def test_format_redundant_dependencies_of_declared_graph_only(tmp_path):
+    artifacts = {
+        name: {"type": "aws:cloudformation:stack", "dependencies": depends_on}
+        for name, depends_on in DEPENDENCIES.items()
+    }
+    (tmp_path / "manifest.json").write_text(json.dumps({"artifacts": artifacts}))
+
+    assert "apex -> network" in StackGraph(DEPENDENCIES).format()
+    assert "redundant" not in StackGraph.from_manifest(str(tmp_path)).format()
@@ -0,0 +1,91 @@
+import aws_cdk as core
+import aws_cdk.assertions as assertions
+import pytest
+
+from openchallenges.stack_registry import StackRegistry
+
+
+def create_registry(app):
+    registry = StackRegistry()
+    registry.add("network", lambda stacks: core.Stack(app, "network"))
+    registry.add(
+        "mariadb",
+        lambda stacks: core.Stack(app, "mariadb"),
+        depends_on=["network"],
+        secrets=["MARIADB_PASSWORD"],
+    )
+    registry.add(
+        "thumbor",
+        lambda stacks: core.Stack(app, "thumbor"),
+        depends_on=["network"],
+        secrets=["SECURITY_KEY"],
+    )
+    return registry
+
+
+def test_build_selected_stacks_and_dependencies():
+    app = core.App()
+    registry = create_registry(app)
+    requested_secrets = []
+
+    def get_secrets(names):
+        requested_secrets.extend(names)
+        return {name: "dummy" for name in names}
+
+    stacks = registry.build(get_secrets, ["thumbor"])
+
+    assert list(stacks) == ["network", "thumbor"]
+    assert requested_secrets == ["SECURITY_KEY"]
+    assert stacks["network"] in stacks["thumbor"].dependencies
+
+
+def test_build_warns_about_partial_dependencies():
+    app = core.App()
+    registry = create_registry(app)
+
+    stacks = registry.build(
+        lambda names: {name: "dummy" for name in names}, ["thumbor"]
+    )
+
+    assertions.Annotations.from_stack(stacks["network"]).has_warning(
+        "*", assertions.Match.string_like_regexp("--exclusively")
+    )
+    assertions.Annotations.from_stack(stacks["thumbor"]).has_no_warning(
+        "*", assertions.Match.any_value()
+    )
+
+
+def test_build_all_stacks():
+    app = core.App()
+    registry = create_registry(app)
+
+    stacks = registry.build(lambda names: {name: "dummy" for name in names})
+
+    assert list(stacks) == ["network", "mariadb", "thumbor"]
+
+
+def test_undeclared_dependency():
+    app = core.App()
+    registry = create_registry(app)
+    registry.add("apex", lambda stacks: stacks["thumbor"])
+
+    with pytest.raises(KeyError):
+        registry.build(lambda names: {}, ["thumbor", "apex"])
+
+
+def test_undeclared_secret():
+    app = core.App()
+    registry = create_registry(app)
+    registry.add("apex", lambda stacks: stacks.secrets["SECURITY_KEY"])
+
+    with pytest.raises(KeyError):
+        registry.build(lambda names: {name: "dummy" for name in names})
+
+
+def test_dependency_cycle():
+    registry = StackRegistry()
+    registry.add("a", lambda stacks: None, depends_on=["b"])
+    registry.add("b", lambda stacks: None, depends_on=["a"])
+
+    with pytest.raises(ValueError):
+        registry.resolve(["a"])
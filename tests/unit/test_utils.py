@@ -0,0 +1,92 @@
+import boto3
+import pytest
+
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
+
+import openchallenges.utils as utils
+
+
+def create_ssm_client():
+    return boto3.client(
+        "ssm",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+
+
+def ssm_parameter(name, value):
+    return {"Name": name, "Type": "SecureString", "Value": value, "Version": 1}
+
+
+def test_get_ssm_secrets_batches_parameters():
+    refs = {f"SECRET_{i}": f"/openchallenges/SECRET_{i}" for i in range(12)}
+    names = list(refs.values())
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        for batch in [names[:10], names[10:]]:
+            stubber.add_response(
+                "get_parameters",
+                {
+                    "Parameters": [ssm_parameter(name, name[-1]) for name in batch],
+                },
+                {"Names": batch, "WithDecryption": True},
+            )
+        secrets = utils.get_ssm_secrets(refs, ssm)
+        stubber.assert_no_pending_responses()
+
+    assert secrets == {key: name[-1] for key, name in refs.items()}
+
+
+def test_get_ssm_secrets_retries_throttling(monkeypatch):
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    refs = {"MARIADB_PASSWORD": "/openchallenges/MARIADB_PASSWORD"}
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        stubber.add_client_error("get_parameters", "ThrottlingException")
+        stubber.add_response(
+            "get_parameters",
+            {
+                "Parameters": [ssm_parameter("/openchallenges/MARIADB_PASSWORD", "pw")],
+            },
+        )
+        secrets = utils.get_ssm_secrets(refs, ssm)
+
+    assert secrets == {"MARIADB_PASSWORD": "pw"}
+
+
+def test_get_ssm_secrets_gives_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(utils.time, "sleep", lambda seconds: None)
+    refs = {"MARIADB_PASSWORD": "/openchallenges/MARIADB_PASSWORD"}
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        for _ in range(utils.SSM_MAX_ATTEMPTS):
+            stubber.add_client_error("get_parameters", "ThrottlingException")
+        with pytest.raises(ClientError):
+            utils.get_ssm_secrets(refs, ssm)
+
+
+def test_get_ssm_secrets_reports_all_missing_parameters():
+    refs = {
+        "MARIADB_PASSWORD": "/openchallenges/MARIADB_PASSWORD",
+        "GIT_HOST_KEY": "/openchallenges/GIT_HOST_KEY",
+        "SECURITY_KEY": "/openchallenges/SECURITY_KEY",
+    }
+    ssm = create_ssm_client()
+    with Stubber(ssm) as stubber:
+        stubber.add_response(
+            "get_parameters",
+            {
+                "Parameters": [ssm_parameter("/openchallenges/MARIADB_PASSWORD", "pw")],
+                "InvalidParameters": [
+                    "/openchallenges/GIT_HOST_KEY",
+                    "/openchallenges/SECURITY_KEY",
+                ],
+            },
+        )
+        with pytest.raises(SystemExit) as e:
+            utils.get_ssm_secrets(refs, ssm)
+
+    assert "/openchallenges/GIT_HOST_KEY" in str(e.value)
+    assert "/openchallenges/SECURITY_KEY" in str(e.value)